@@ -1,7 +1,11 @@
-from flask import Flask, render_template, send_from_directory, Response, redirect
-import subprocess
+from flask import Flask, render_template, send_file, Response, redirect, jsonify, request, abort
+from argparse import ArgumentTypeError
+import asyncio
+import hashlib
+import json
 import os
 import re
+import sys
 from datetime import datetime
 import logging
 
@@ -13,6 +17,18 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+# 스크래핑 파이프라인은 src에 있으므로 경로 추가 (로그 설정 이후에 import 해야 flask_app.log 설정이 유지됨)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+import pipeline
+from job_manager import JobManager
+import change_feed
+from metrics import METRICS
+import browser_service
+from script_loader import load_script
+from records import BRAND_ORDER
+from data_index import DataIndex, ROW_TABLES
+from sharding import parse_brands
+
 # Flask 앱 생성
 app = Flask(__name__)
 DATA_DIR = "data"
@@ -20,63 +36,199 @@ DATA_ETC_DIR = os.path.join(DATA_DIR, "etc")
 
 logger = logging.getLogger(__name__)
 
+# 스크래핑은 단일 워커에서 하나씩 실행 (중복 요청은 진행 중인 잡에 연결)
+job_manager = JobManager(os.path.join(DATA_DIR, "jobs"))
+
+# 날짜/결과 파일 색인 (디렉터리 mtime이 바뀌거나 잡이 끝나면 다시 훑음)
+data_index = DataIndex(DATA_DIR)
+job_manager.add_listener(lambda job: data_index.invalidate())
+
+# AUTOSCRAP_BROWSER_SERVICE_START=1 이면 Flask 프로세스 안에서 상시 실행 브라우저를 띄워 잡마다 Chromium을 새로 launch 하지 않음
+# (이미 AUTOSCRAP_BROWSER_SERVICE로 외부 서비스를 지정했다면 그쪽을 사용)
+if os.environ.get("AUTOSCRAP_BROWSER_SERVICE_START") == "1" and not os.environ.get(browser_service.SERVICE_ENV):
+    try:
+        browser_service.start_background(
+            recycle_after=int(os.environ.get("AUTOSCRAP_BROWSER_RECYCLE_AFTER", browser_service.DEFAULT_RECYCLE_AFTER)),
+        )
+    except Exception as e:
+        logger.error(f"브라우저 서비스 시작 실패, 잡마다 브라우저를 직접 실행합니다: {e}")
+
 # Get available dates from existing data files
 def get_available_dates():
-    dates = set()
-    file_pattern = re.compile(r'car_data_(\d{8})\.xlsx')
-    
-    for filename in os.listdir(DATA_DIR):
-        match = file_pattern.match(filename)
-        if match:
-            dates.add(match.group(1))
-            
-    return sorted(list(dates), reverse=True)  # Most recent first
+    return data_index.dates()  # Most recent first
 
 @app.route("/")
 def index():
     logger.info('메인 페이지 접속')
     today = datetime.now().strftime("%Y%m%d")
     available_dates = get_available_dates()
-    return render_template("index.html", date=today, today=today, available_dates=available_dates)
+    changes = change_feed.load_report(today)
+    return render_template("index.html", date=today, today=today, available_dates=available_dates, artifacts=data_index.artifacts(today), changes=changes)
 
 @app.route("/date/<date>")
 def show_date(date):
     today = datetime.now().strftime("%Y%m%d")
     available_dates = get_available_dates()
-    return render_template("index.html", date=date, today=today, available_dates=available_dates)
+    changes = change_feed.load_report(date)
+    return render_template("index.html", date=date, today=today, available_dates=available_dates, artifacts=data_index.artifacts(date), changes=changes)
+
+@app.route("/changes/<date>")
+def show_changes(date):
+    # 직전 수집일 대비 변화 (JSON). 파일이 없으면 히스토리 저장소에서 바로 계산
+    if not re.fullmatch(r"\d{8}", date):
+        abort(404)
+    report = change_feed.load_report(date)
+    if report is None:
+        report = change_feed.build_report(date)
+    return jsonify(report)
+
+def run_pipeline_job():
+    status, _ = asyncio.run(pipeline.run_pipeline())
+    return status
+
+def follow_job(job, since=0):
+    # 잡이 끝날 때까지 새 로그를 순서대로 돌려줌 (클라이언트 연결이 끊겨도 잡은 계속 실행됨)
+    while True:
+        lines, active = job_manager.wait(job, since)
+        for entry in lines:
+            yield entry
+            since = entry["seq"] + 1
+        if not active and not lines:
+            return
 
 @app.route("/run-all")
 def run_all():
     logger.info('자동 스크래핑 실행 요청 받음')
+    job, created = job_manager.submit("run-all", run_pipeline_job)
+    if created:
+        logger.info(f'새 스크래핑 잡 생성: {job.id}')
+    else:
+        logger.info(f'진행 중인 스크래핑 잡에 연결: {job.id}')
+
     def generate():
-        cmds = [
-            ["python3", "src/autoscrap.py"],
-            ["python3", "src/autoscrap-web.py"],
-            ["python3", "src/autoscrap-compare.py"]
-        ]
-        for cmd in cmds:
-            yield f"\n==== Running: {' '.join(cmd)} ====\n"
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-            for line in iter(process.stdout.readline, ''):
-                yield line
-            process.stdout.close()
-            process.wait()
+        yield f"==== Job {job.id} ({'새로 시작' if created else '이미 실행 중인 잡에 연결'}) ====\n"
+        yield f"상태 조회: /jobs/{job.id}  |  진행 스트림: /jobs/{job.id}/events\n\n"
+        for entry in follow_job(job):
+            yield entry["line"] + "\n"
 
         today = datetime.now().strftime("%Y%m%d")
-        yield f"\n✅ 전체 완료! 아래에서 결과 다운로드:\n"
+        yield f"\n✅ 전체 완료 ({job.status})! 아래에서 결과 다운로드:\n"
         yield f"➡️ /download/car_data_{today}.xlsx\n"
         yield f"➡️ /download/car_data_web_{today}.xlsx\n"
         yield f"➡️ /download/discrepancies_{today}.xlsx\n"
+        yield f"➡️ /changes/{today}\n"
 
-    logger.info('자동 스크래핑 실행 완료')
     return Response(generate(), mimetype='text/plain')
 
+def run_refresh_job(brand, series):
+    autoscrap = load_script("autoscrap.py", "autoscrap")
+    return asyncio.run(autoscrap.refresh_series(brand, series))
+
+@app.route("/refresh", methods=["POST"])
+def refresh():
+    # 시리즈 하나만 다시 수집 (JSON 또는 폼: brand, series). 같은 시리즈 요청이 진행 중이면 그 잡에 연결
+    params = request.get_json(silent=True) or request.form
+    series = (params.get("series") or "").strip()
+    try:
+        # "02_MB", "MB", "mb" 모두 허용 (CLI --refresh, /data와 같은 규칙)
+        brands = parse_brands((params.get("brand") or "").strip())
+    except ArgumentTypeError:
+        brands = []
+    if len(brands) != 1 or not series:
+        return jsonify({"error": "brand(하나)와 series가 필요합니다.", "brands": [str(b) for b in BRAND_ORDER]}), 400
+    brand = brands[0]
+
+    logger.info(f'시리즈 재수집 요청: {brand} {series}')
+    job, created = job_manager.submit(
+        "refresh", lambda: run_refresh_job(brand, series),
+        key=f"refresh:{brand}:{series}", params={"brand": str(brand), "series": series},
+    )
+    payload = job_manager.snapshot(job)
+    payload.update(created=created, status_url=f"/jobs/{job.id}", events_url=f"/jobs/{job.id}/events")
+    return jsonify(payload), 202
+
+@app.route("/jobs")
+def list_jobs():
+    return jsonify([job_manager.snapshot(job) for job in job_manager.list()])
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        abort(404)
+    since = request.args.get("since", type=int)
+    return jsonify(job_manager.snapshot(job, since=since))
+
+@app.route("/jobs/<job_id>/poll")
+def job_poll(job_id):
+    # long-poll: since 이후 로그가 생기거나 잡이 끝날 때까지 최대 timeout초 대기
+    job = job_manager.get(job_id)
+    if job is None:
+        abort(404)
+    since = request.args.get("since", default=0, type=int)
+    timeout = min(request.args.get("timeout", default=25, type=float), 60)
+    lines, active = job_manager.wait(job, since, timeout=timeout)
+    next_seq = lines[-1]["seq"] + 1 if lines else since
+    return jsonify({"id": job.id, "status": job.status, "active": active, "lines": lines, "next": next_seq})
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    # SSE: 재연결 시 Last-Event-ID 다음 줄부터 이어서 전송
+    job = job_manager.get(job_id)
+    if job is None:
+        abort(404)
+    since = request.headers.get("Last-Event-ID", type=int)
+    if since is None:
+        since = request.args.get("since", default=-1, type=int)
+
+    def generate():
+        for entry in follow_job(job, since + 1):
+            yield f"id: {entry['seq']}\ndata: {json.dumps(entry['line'], ensure_ascii=False)}\n\n"
+        yield f"event: end\ndata: {json.dumps(job_manager.snapshot(job), ensure_ascii=False, default=str)}\n\n"
+
+    return Response(generate(), mimetype='text/event-stream', headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/metrics")
+def metrics():
+    # Prometheus 텍스트 형식 (서버 시작 이후 실행된 잡들의 누적값)
+    return Response(METRICS.prometheus_text(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/data/<date>.json")
+def date_rows(date):
+    # 날짜별 행 (엑셀을 다시 파싱하지 않고 히스토리 저장소 스냅샷을 캐시해서 반환)
+    # ?source=app|web, brand/series로 필터. ETag는 히스토리 DB 버전 기준이라 변경이 없으면 304
+    source = request.args.get("source", "app")
+    if not re.fullmatch(r"\d{8}", date) or source not in ROW_TABLES:
+        abort(404)
+    version, rows = data_index.rows(date, source)
+    if not rows:
+        return jsonify({"error": f"{date} {source} 데이터가 히스토리 저장소에 없습니다. (python src/history_store.py backfill)"}), 404
+
+    brand = request.args.get("brand")
+    series = request.args.get("series")
+    if brand:
+        # "02_MB", "MB", "mb" 모두 허용 (--brands와 같은 규칙)
+        try:
+            brand = {str(b) for b in parse_brands(brand)}
+        except ArgumentTypeError as e:
+            return jsonify({"error": str(e)}), 400
+        rows = [row for row in rows if row["brand"] in brand]
+    if series:
+        rows = [row for row in rows if row["series"] == series]
+
+    response = jsonify({"date": date, "source": source, "count": len(rows), "rows": rows})
+    # 시리즈명에 한글이 있을 수 있어 헤더에는 해시만
+    response.set_etag(hashlib.sha1(f"{date}/{source}/{sorted(brand or [])}/{series}/{version}".encode("utf-8")).hexdigest())
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 @app.route("/download/<filename>")
 def download(filename):
-    if "web" in filename or "discrepancies" in filename:
-        return send_from_directory(DATA_ETC_DIR, filename, as_attachment=True)
-    else:
-        return send_from_directory(DATA_DIR, filename, as_attachment=True)
+    # 색인에 있는 결과 파일만 제공. ETag/Last-Modified로 조건부 요청(If-None-Match/If-Modified-Since) 시 304
+    path = data_index.path(filename)
+    if path is None:
+        abort(404)
+    return send_file(os.path.abspath(path), as_attachment=True, conditional=True, etag=True)
 
 # 애플리케이션 실행 시 로깅
 if __name__ == "__main__":
@@ -12,6 +12,6 @@ call auto\Scripts\activate.bat
 
 pip install -r requirements.txt
 
-python src\autoscrap.py
+python src\pipeline.py
 
-pause
\ No newline at end of file
+pause
\ No newline at end of file
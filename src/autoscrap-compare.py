@@ -4,6 +4,8 @@ import logging
 from datetime import datetime
 import sys
 from pathlib import Path
+from metrics import METRICS
+from records import money_column
 
 logging.basicConfig(
     level=logging.INFO,
@@ -62,12 +64,11 @@ def preprocess_data(car_data_df, car_data_web_df):
         
         car_data_df = car_data_df.rename(columns={'Model (adjusted)': 'Model'})
         
-        car_data_df['MSRP'] = car_data_df['MSRP'].astype(str).str.replace(',', '').replace('', '0').fillna('0')
-        car_data_web_df['MSRP'] = car_data_web_df['MSRP'].astype(str).str.replace(',', '').replace('', '0').fillna('0')
-        
-        car_data_df['Cash_off'] = car_data_df['Cash_off'].astype(str).str.replace(',', '').replace('', '0').fillna('0')
-        car_data_df['Finance_off'] = car_data_df['Finance_off'].astype(str).str.replace(',', '').replace('', '0').fillna('0')
-        car_data_web_df['Off'] = car_data_web_df['Off'].astype(str).str.replace(',', '').replace('만원', '').replace('', '0').fillna('0')
+        # 금액은 Int64 (값이 없거나 "N/A"면 <NA>). 스크래퍼가 넘긴 정수 컬럼은 그대로, 예전 엑셀의 "1,234"만 변환
+        for col in ['MSRP', 'Cash_off', 'Finance_off']:
+            car_data_df[col] = money_column(car_data_df[col])
+        for col in ['MSRP', 'Off']:
+            car_data_web_df[col] = money_column(car_data_web_df[col])
         
         car_data_df['MY'] = car_data_df['MY'].astype(str)
         car_data_web_df['MY'] = car_data_web_df['MY'].astype(str)
@@ -82,7 +83,115 @@ def ensure_directories():
     os.makedirs("data", exist_ok=True)
     os.makedirs("data/etc", exist_ok=True)
 
-def compare_data(car_data_df, car_data_web_df, car_data_path, date=None):
+MATCH_KEYS = ['Brand', 'Series', 'MY', 'Model']
+DISCREPANCY_COLUMNS = [
+    'Brand', 'Series', 'MY', 'Model', 'Web_MSRP', 'Web_Off',
+    'App_MSRP', 'App_Cash_off', 'App_Finance_off', 'Issue'
+]
+MISSING_MODEL_COLUMNS = [
+    'Year', 'Month', 'Date', 'Brand', 'MY', 'Series', 'Fuel Type',
+    'Model (adjusted)', 'MSRP', 'Cash_off', 'Finance_off', 'Validated'
+]
+
+def valid_money(column):
+    # 금액이 있는 값인지 (<NA>가 아닌지)
+    return column.notna()
+
+def valid_off(column):
+    # 할인이 있는 값인지 (<NA>도 0도 아닌지)
+    return column.notna() & column.fillna(0).ne(0)
+
+def money_ne(left, right):
+    # 둘 다 값이 있을 때만 의미 있는 비교 (<NA>가 섞이면 False)
+    return left.ne(right).fillna(False).astype(bool)
+
+def find_discrepancies(car_data_df, car_data_web_df):
+    # car_data_web에서 할인(Off)이 0인 모델만 제외 (할인 값이 없는 <NA> 행은 남겨 MSRP 불일치는 계속 확인)
+    # 할인 값 유효성(valid_off)은 아래 missing / 할인 불일치 조건에서만 적용
+    web_models_with_off = car_data_web_df[~car_data_web_df['Off'].eq(0).fillna(False).astype(bool)]
+
+    logging.info(f"할인 제공 모델 수: {len(web_models_with_off)}")
+
+    web = web_models_with_off[MATCH_KEYS + ['MSRP', 'Off']].reset_index(drop=True)
+    web['_web_pos'] = range(len(web))
+
+    app = car_data_df[MATCH_KEYS + ['MSRP', 'Cash_off', 'Finance_off']].rename(columns={
+        'MSRP': 'App_MSRP', 'Cash_off': 'App_Cash_off', 'Finance_off': 'App_Finance_off'
+    })
+    # 키에 NaN이 있는 행은 == 비교로는 절대 일치하지 않으므로 조인 전에 제외 (merge는 NaN끼리 매칭함)
+    app = app[app[MATCH_KEYS].notna().all(axis=1)].reset_index(drop=True)
+    app['_app_pos'] = range(len(app))
+
+    # (Brand, Series, MY, Model) 키 조인, 타입이 다른 키(예: 숫자 시리즈명)도 == 비교와 같은 결과가 되도록 object로 맞춤
+    web_keys = web.astype({key: object for key in MATCH_KEYS})
+    app_keys = app.astype({key: object for key in MATCH_KEYS})
+    merged = web_keys.merge(app_keys, on=MATCH_KEYS, how='left', indicator=True, sort=False)
+    merged = merged.sort_values(['_web_pos', '_app_pos'], kind='stable').reset_index(drop=True)
+
+    matched = merged['_merge'] == 'both'
+
+    # 앱 데이터에 없는 모델 (Web_Off가 유효한 값일 때만 문제로 간주)
+    missing = ~matched & valid_off(merged['Off'])
+
+    # 금액은 정수 비교, 값이 없는(<NA>) 쪽이 있으면 비교하지 않음
+    msrp_issue = (
+        matched
+        & valid_money(merged['MSRP'])
+        & valid_money(merged['App_MSRP'])
+        & money_ne(merged['MSRP'], merged['App_MSRP'])
+    )
+    # 유효한 값이고 웹 할인이 앱 현금 할인이나 금융 할인 중 하나와 일치하지 않는 경우만 이슈로 처리
+    discount_issue = (
+        matched
+        & valid_off(merged['Off'])
+        & valid_off(merged['App_Cash_off'])
+        & valid_off(merged['App_Finance_off'])
+        & money_ne(merged['Off'], merged['App_Cash_off'])
+        & money_ne(merged['Off'], merged['App_Finance_off'])
+    )
+
+    merged['Issue'] = ''
+    if missing.any():
+        merged.loc[missing, 'Issue'] = 'Model not found in app data'
+        # 결과 파일에는 앱 값 대신 'Not Found' 표시 (정수 컬럼이라 object로 바꾼 뒤 기록)
+        app_value_columns = ['App_MSRP', 'App_Cash_off', 'App_Finance_off']
+        merged[app_value_columns] = merged[app_value_columns].astype(object)
+        merged.loc[missing, app_value_columns] = 'Not Found'
+    if msrp_issue.any():
+        rows = merged[msrp_issue]
+        merged.loc[msrp_issue, 'Issue'] = "MSRP mismatch: Web=" + rows['MSRP'].astype(str) + ", App=" + rows['App_MSRP'].astype(str)
+    if discount_issue.any():
+        rows = merged[discount_issue]
+        message = (
+            "Discount mismatch: Web=" + rows['Off'].astype(str)
+            + ", App Cash=" + rows['App_Cash_off'].astype(str)
+            + ", App Finance=" + rows['App_Finance_off'].astype(str)
+        )
+        merged.loc[discount_issue, 'Issue'] = (rows['Issue'] + '; ').where(msrp_issue[discount_issue], '') + message
+
+    issues = merged[missing | msrp_issue | discount_issue]
+    discrepancies_df = issues.rename(columns={'MSRP': 'Web_MSRP', 'Off': 'Web_Off'})[DISCREPANCY_COLUMNS].reset_index(drop=True)
+
+    today = datetime.now()
+    missing_rows = merged[missing]
+    missing_df = pd.DataFrame({
+        'Year': today.year,
+        'Month': today.month,
+        'Date': today.day,
+        'Brand': missing_rows['Brand'],
+        'MY': missing_rows['MY'],
+        'Series': missing_rows['Series'],
+        'Fuel Type': '',
+        'Model (adjusted)': missing_rows['Model'],
+        'MSRP': missing_rows['MSRP'],
+        'Cash_off': '',
+        'Finance_off': '',
+        'Validated': 'X',
+    }, columns=MISSING_MODEL_COLUMNS).reset_index(drop=True)
+
+    return discrepancies_df, missing_df
+
+def compare_data(car_data_df, car_data_web_df, car_data_path, date=None, original_df=None):
     if date is None:
         date = datetime.now().strftime("%Y%m%d")
     
@@ -90,135 +199,42 @@ def compare_data(car_data_df, car_data_web_df, car_data_path, date=None):
         return
     
     ensure_directories()
-    
-    discrepancies = []
-    
-    # car_data_web에서 할인(Off)이 있는 모델만 필터링
-    web_models_with_off = car_data_web_df[car_data_web_df['Off'] != '0']
-    
-    logging.info(f"할인 제공 모델 수: {len(web_models_with_off)}")
-    
-    missing_models = []
-    
-    for _, web_row in web_models_with_off.iterrows():
-        # car_data에서 일치하는 모델 찾기 (Brand, Series, MY, Model 모두 일치하는 경우)
-        matching_models = car_data_df[
-            (car_data_df['Brand'] == web_row['Brand']) & 
-            (car_data_df['Series'] == web_row['Series']) & 
-            (car_data_df['MY'] == web_row['MY']) &
-            (car_data_df['Model'] == web_row['Model'])
-        ]
-
-        if len(matching_models) == 0:
-            # Web_Off가 유효한 값일 때만 문제로 간주
-            if web_row['Off'] not in ['nan', 'Not Found', 'N/A', '0']:
-                discrepancy = {
-                    'Brand': web_row['Brand'],
-                    'Series': web_row['Series'],
-                    'MY': web_row['MY'],
-                    'Model': web_row['Model'],
-                    'Web_MSRP': web_row['MSRP'],
-                    'Web_Off': web_row['Off'],
-                    'App_MSRP': 'Not Found',
-                    'App_Cash_off': 'Not Found',
-                    'App_Finance_off': 'Not Found',
-                    'Issue': 'Model not found in app data'
-                }
-                discrepancies.append(discrepancy)
-
-                today = datetime.now()
-                missing_model = {
-                    'Year': today.year,
-                    'Month': today.month,
-                    'Date': today.day,
-                    'Brand': web_row['Brand'],
-                    'MY': web_row['MY'],
-                    'Series': web_row['Series'],
-                    'Fuel Type': '',
-                    'Model (adjusted)': web_row['Model'],
-                    'MSRP': web_row['MSRP'],
-                    'Cash_off': '',
-                    'Finance_off': '',
-                    'Validated': 'X'
-                }
-                missing_models.append(missing_model)
-            continue
-        
-        # 일치하는 모델이 있는 경우 비교
-        for _, app_row in matching_models.iterrows():
-            issues = []
 
-            web_msrp = web_row['MSRP']
-            app_msrp = app_row['MSRP']
-            
-            # 유효한 값인지 체크 (nan, not found 등이 아닌지)
-            if (web_msrp not in ['nan', 'Not Found', 'N/A'] and 
-                app_msrp not in ['nan', 'Not Found', 'N/A'] and 
-                web_msrp != app_msrp):
-                issues.append(f"MSRP mismatch: Web={web_msrp}, App={app_msrp}")
-            
-            web_off = web_row['Off']
-            app_cash_off = app_row['Cash_off']
-            app_finance_off = app_row['Finance_off']
-            # nan, not found 등의 값은 비교에서 제외
-            valid_comparison = (
-                web_off not in ['nan', 'Not Found', 'N/A', '0'] and
-                app_cash_off not in ['nan', 'Not Found', 'N/A', '0'] and
-                app_finance_off not in ['nan', 'Not Found', 'N/A', '0']
-            )
-            
-            # 유효한 값이고 웹 할인이 앱 현금 할인이나 금융 할인 중 하나와 일치하지 않는 경우만 이슈로 처리
-            if valid_comparison and web_off != app_cash_off and web_off != app_finance_off:
-                issues.append(f"Discount mismatch: Web={web_off}, App Cash={app_cash_off}, App Finance={app_finance_off}")
-            
-            # 특별 케이스 처리: 모든 값이 'nan', 'Not Found' 등인 경우는 문제 없음으로 처리
-            if (web_row['Off'] in ['nan', 'Not Found', 'N/A'] and 
-                app_row['MSRP'] in ['nan', 'Not Found', 'N/A'] and 
-                app_row['Cash_off'] in ['nan', 'Not Found', 'N/A'] and 
-                app_row['Finance_off'] in ['nan', 'Not Found', 'N/A']):
-                continue
-            
-            if issues:                
-                discrepancies.append({
-                    'Brand': web_row['Brand'],
-                    'Series': web_row['Series'],
-                    'MY': web_row['MY'],
-                    'Model': web_row['Model'],
-                    'Web_MSRP': web_row['MSRP'],
-                    'Web_Off': web_row['Off'],
-                    'App_MSRP': app_row['MSRP'],
-                    'App_Cash_off': app_row['Cash_off'],
-                    'App_Finance_off': app_row['Finance_off'],
-                    'Issue': '; '.join(issues)
-                })
-    
-    if discrepancies:
-        discrepancies_df = pd.DataFrame(discrepancies)
+    with METRICS.timer("compare"):
+        discrepancies_df, missing_df = find_discrepancies(car_data_df, car_data_web_df)
+
+    if len(discrepancies_df) > 0:
         output_file = f"data/etc/discrepancies_{date}.xlsx"
         
         # 이미 파일이 존재하더라도 새 데이터로 덮어쓰기 (기존 데이터는 버림)
-        with pd.ExcelWriter(output_file, engine="openpyxl", mode="w") as writer:
+        with METRICS.timer("excel_write", file="discrepancies"), pd.ExcelWriter(output_file, engine="openpyxl", mode="w") as writer:
             discrepancies_df.to_excel(writer, index=False)
         
-        logging.info(f"불일치 항목 {len(discrepancies)}개 발견, 결과 저장됨: {output_file} (기존 데이터 덮어씀)")
+        logging.info(f"불일치 항목 {len(discrepancies_df)}개 발견, 결과 저장됨: {output_file} (기존 데이터 덮어씀)")
     else:
         logging.info("모든 할인 모델이 일치합니다.")
+        # 같은 날 다시 비교한 경우 (시리즈 재수집 등) 이전 불일치 파일이 남아 있지 않도록
+        stale_file = f"data/etc/discrepancies_{date}.xlsx"
+        if os.path.exists(stale_file):
+            os.remove(stale_file)
+            logging.info(f"이전 불일치 파일 삭제: {stale_file}")
     
-    if missing_models:
+    if len(missing_df) > 0:
         try:
-            original_df = pd.read_excel(car_data_path)
+            # 파이프라인에서 호출되면 이미 메모리에 있는 원본 앱 데이터를 사용 (엑셀 재파싱 없음)
+            if original_df is None:
+                original_df = pd.read_excel(car_data_path)
+            original_df = original_df.copy()
             
             if 'Validated' not in original_df.columns:
                 original_df['Validated'] = 'O'
             
-            missing_df = pd.DataFrame(missing_models)
-            
             updated_df = pd.concat([original_df, missing_df], ignore_index=True)
             
-            with pd.ExcelWriter(car_data_path, engine="openpyxl", mode="w") as writer:
+            with METRICS.timer("excel_write", file="app_validated"), pd.ExcelWriter(car_data_path, engine="openpyxl", mode="w") as writer:
                 updated_df.to_excel(writer, index=False)
             
-            logging.info(f"앱에 없는 모델 {len(missing_models)}개를 {car_data_path}에 추가했습니다.")
+            logging.info(f"앱에 없는 모델 {len(missing_df)}개를 {car_data_path}에 추가했습니다.")
         except Exception as e:
             logging.error(f"앱 데이터 업데이트 중 오류 발생: {e}")
 
@@ -236,6 +252,24 @@ def main(date=None):
     
     compare_data(car_data_df, car_data_web_df, car_data_path, date)
 
+def compare_frames(car_data_df, car_data_web_df, date=None):
+    # 파이프라인용: 스크래퍼가 반환한 DataFrame을 그대로 받아 비교 (엑셀 다시 읽지 않음)
+    if date is None:
+        date = datetime.now().strftime("%Y%m%d")
+
+    if car_data_df is None or car_data_web_df is None:
+        logging.error("비교할 데이터가 없습니다.")
+        return
+
+    car_data_path = Path("data") / f"car_data_{date}.xlsx"
+    original_df = car_data_df
+
+    car_data_df, car_data_web_df = preprocess_data(car_data_df.copy(), car_data_web_df.copy())
+    if car_data_df is None or car_data_web_df is None:
+        return
+
+    compare_data(car_data_df, car_data_web_df, car_data_path, date, original_df=original_df)
+
 if __name__ == "__main__":
     import argparse
     
@@ -244,4 +278,4 @@ if __name__ == "__main__":
     
     args = parser.parse_args()
     
-    main(args.date)
\ No newline at end of file
+    main(args.date)
\ No newline at end of file
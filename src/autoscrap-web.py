@@ -1,24 +1,21 @@
 import asyncio
 import json
-from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
 import pandas as pd
 from datetime import datetime
 import os
 import logging
-import sys
-import importlib.util
-from pathlib import Path
 import re
-
-compare_file_path = os.path.join(os.path.dirname(__file__), 'autoscrap-compare.py')
-if os.path.exists(compare_file_path):
-    spec = importlib.util.spec_from_file_location("data_compare", compare_file_path)
-    data_compare = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(data_compare)
-else:
-    print("Warning: autoscrap-compare.py 파일을 찾을 수 없습니다.")
-    data_compare = None
+import history_store
+import recording
+import browser_service
+from metrics import METRICS
+from waits import wait_until_ready
+from request_policy import RequestPolicy
+from records import WebRecord, Brand, BRAND_ORDER, records_to_frame, to_int
+from sharding import parse_brands
+from html_parser import parse_html, set_default_backend, BACKENDS, DEFAULT_BACKEND
+from script_loader import load_script
 
 # 로깅 설정 개선
 logging.basicConfig(
@@ -26,6 +23,16 @@ logging.basicConfig(
     format='%(asctime)s [%(levelname)s] %(message)s',
 )
 
+# 수집 후 비교 단계 실행용 (불러오지 못하면 비교 없이 수집만 진행)
+try:
+    data_compare = load_script("autoscrap-compare.py", "data_compare")
+except Exception as e:
+    logging.warning(f"⚠️ autoscrap-compare.py를 불러오지 못했습니다: {e}")
+    data_compare = None
+
+SECTION_SELECTOR = 'section[class="_1vrlmaf2 _1vrlmaf0"]'
+SECTION_TIMEOUT = 15000
+
 def ensure_directories():
     os.makedirs("src", exist_ok=True)
     os.makedirs("data", exist_ok=True)
@@ -36,119 +43,184 @@ def load_urls():
         data = json.load(f)
     return data["url"]
 
-async def scrape_all_sections():
-    all_results = []
-    urls = load_urls()    
-    brand_map = {
-        0: "01_BMW",
-        1: "04_Mini",
-        2: "02_MB",
-        3: "03_Audi",
-        4: "12_Volkswagen",
-    }
-
-    for i, url in enumerate(urls):
-        results = []
-        brand = brand_map.get(i, f"Unknown_{i}")        
-        print(f"브랜드 {brand} 스크래핑 시작: {url}")
+@METRICS.measure("parse", extractor="sections")
+def extract_sections(content, brand):
+    results = []
+    root = parse_html(content)
+
+    sections = root.select(SECTION_SELECTOR)
+    for section in sections:
+        section_id = section.get("id", "no-id")
+        
+        # 시리즈 이름 추출
+        series_name = section_id  # 기본값으로 section_id 사용
+        section_header = section.select_one("h3.j00ses5")
+        if section_header:
+            header_text_nodes = section_header.strings()
+            
+            if len(header_text_nodes) >= 2:
+                series_name = header_text_nodes[1].strip()
+            elif header_text_nodes:
+                series_name = header_text_nodes[0].strip()
         
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True, args=['--disable-gpu', '--disable-dev-shm-usage', '--no-sandbox'])
-            page = await browser.new_page()
-            # 페이지 생성 후 이미지, 스타일시트, 폰트 등 불필요한 리소스 차단
-            await page.route('**/*.{png,jpg,jpeg,svg,css,woff,woff2}', lambda route: route.abort())
+        # 연식 정보 추출
+        model_year = "25"  # 기본값
+        if section_header:
+            year_span = section_header.select_one("span")
+            if year_span:
+                year_text = year_span.text()
+                year_match = re.search(r'(\d+)년식', year_text)
+                if year_match:
+                    model_year = year_match.group(1)
+                else:
+                    year_match = re.search(r'20(\d{2})년식', year_text)
+                    if year_match:
+                        model_year = year_match.group(1)
+
+        rows = section.select("a._15c6uvi5, div._15c6uvi5")
+        for row in rows:
             try:
-                await page.goto(url, timeout=60000)
-                await page.wait_for_load_state("load")                
-                content = await page.content()
-                soup = BeautifulSoup(content, "html.parser")
-
-                sections = soup.find_all("section", class_="_1vrlmaf2 _1vrlmaf0")
-                for section in sections:
-                    section_id = section.get("id", "no-id")
-                    
-                    # 시리즈 이름 추출
-                    series_name = section_id  # 기본값으로 section_id 사용
-                    section_header = section.select_one("h3.j00ses5")
-                    if section_header:
-                        header_text_nodes = [text for text in section_header.stripped_strings]
-                        
-                        if len(header_text_nodes) >= 2:
-                            series_name = header_text_nodes[1].strip()
-                        elif header_text_nodes:
-                            series_name = header_text_nodes[0].strip()
-                    
-                    # 연식 정보 추출
-                    model_year = "25"  # 기본값
-                    if section_header:
-                        year_span = section_header.select_one("span")
-                        if year_span:
-                            year_text = year_span.get_text(strip=True)
-                            year_match = re.search(r'(\d+)년식', year_text)
-                            if year_match:
-                                model_year = year_match.group(1)
-                            else:
-                                year_match = re.search(r'20(\d{2})년식', year_text)
-                                if year_match:
-                                    model_year = year_match.group(1)
-
-                    rows = section.select("a._15c6uvi5, div._15c6uvi5")
-                    for row in rows:
-                        try:
-                            # 모델명 추출
-                            model_name_elem = row.select_one("span._15c6uvi9")
-                            if not model_name_elem:
-                                continue
-                        
-                            model_name = model_name_elem.get_text(strip=True)
-                            
-                            msrp_elem = row.select_one("div._15c6uvi7 span._15c6uvif")
-                            msrp = msrp_elem.get_text(strip=True) if msrp_elem else ""
-                            
-                            discount_elem = row.select_one("span._15c6uvim._15c6uvif")
-                            discount = discount_elem.get_text(strip=True) if discount_elem else "0"
-                            
-                            logging.info(f"추출: {model_name}, 출고가: {msrp}만원, 할인: {discount}만원")
-                            
-                            results.append({
-                                "Brand": brand,
-                                "Series": series_name,
-                                "MY": model_year,
-                                "Model": model_name,
-                                "MSRP": msrp,
-                                "Off": discount
-                            })
-                        except Exception as e:
-                            logging.error(f"행 데이터 추출 중 오류 발생: {e}")
-                            results.append({
-                                "Brand": brand,
-                                "Series": section_id,
-                                "MY": model_year,
-                                "Model": "Error",
-                                "MSRP": "",
-                                "Off": str(e)
-                            })
+                # 모델명 추출
+                model_name_elem = row.select_one("span._15c6uvi9")
+                if not model_name_elem:
+                    continue
+            
+                model_name = model_name_elem.text()
+                
+                msrp_elem = row.select_one("div._15c6uvi7 span._15c6uvif")
+                msrp = to_int(msrp_elem.text()) if msrp_elem else None
+                
+                discount_elem = row.select_one("span._15c6uvim._15c6uvif")
+                discount = to_int(discount_elem.text()) if discount_elem else 0
                 
-                all_results.extend(results)
-                print(f"{brand} 스크래핑 완료: {len(results)}개 항목")
+                logging.info(f"추출: {model_name}, 출고가: {msrp}만원, 할인: {discount}만원")
+                
+                results.append(WebRecord(brand, series_name, model_year, model_name, msrp, discount))
+            except Exception as e:
+                # 오류 내용은 로그에만 남기고, 금액이 없는 Error 행으로 기록 (비교에서는 유효하지 않은 값으로 처리)
+                logging.error(f"행 데이터 추출 중 오류 발생: {e}")
+                results.append(WebRecord(brand, section_id, model_year, "Error", None, None))
+
+    return results
+
+async def scrape_brand_page(page_pool, brand, url):
+    # 페이지 풀에서 페이지를 하나 빌려 브랜드 페이지를 수집하고 반납
+    page = await page_pool.get()
+    try:
+        logging.info(f"브랜드 {brand} 스크래핑 시작: {url}")
+        with METRICS.unit("web_brand", brand) as unit:
+            await METRICS.track("goto", page.goto(url, timeout=60000), brand=brand, target="web")
+            try:
+                # goto가 load까지 기다리므로, 그 뒤에는 섹션 목록이 다 그려졌는지만 확인
+                await METRICS.track("wait_for_sections", wait_until_ready(page.locator(SECTION_SELECTOR), SECTION_TIMEOUT), brand=brand)
             except Exception as e:
-                print(f"에러 발생: {e}")
-            finally:
-                await browser.close()
-    df = pd.DataFrame(all_results)
-    print(df)
+                logging.warning(f"⚠️ {brand} 섹션 목록 대기 실패, 현재 페이지로 진행: {e}")
+            content = await page.content()
+            recording.snapshot("web", brand, content)
+            results = extract_sections(content, brand)
+            unit["rows"] = len(results)
+
+        logging.info(f"{brand} 스크래핑 완료: {len(results)}개 항목")
+        return results
+    except Exception as e:
+        logging.error(f"{brand} 에러 발생: {e}")
+        return []
+    finally:
+        page_pool.put_nowait(page)
+
+def load_other_brands(file_path, brands):
+    # --brands로 일부만 다시 수집할 때, 오늘 파일에 있던 나머지 브랜드 행은 유지
+    if not os.path.exists(file_path):
+        return []
+    df = pd.read_excel(file_path, dtype={"Brand": str, "Series": str, "MY": str, "Model": str})
+    return [
+        WebRecord(Brand.parse(row.Brand), row.Series, row.MY, row.Model, to_int(row.MSRP), to_int(row.Off))
+        for row in df.itertuples(index=False)
+        if row.Brand not in brands
+    ]
+
+async def scrape_all_sections(concurrency=3, request_policy=None, brands=None):
+    all_results = []
+    urls = load_urls()    
+    # urls-web.json은 BRAND_ORDER 순서, 목록보다 많은 URL은 Unknown_N으로 저장
+    targets = [
+        (BRAND_ORDER[i] if i < len(BRAND_ORDER) else f"Unknown_{i}", url)
+        for i, url in enumerate(urls)
+    ]
+    if brands:
+        targets = [(brand, url) for brand, url in targets if brand in brands]
+    logging.info(f"🏷️ 웹 수집 대상 브랜드: {', '.join(str(brand) for brand, _ in targets)}")
+
+    # 이미지/폰트/CSS/외부 도메인 요청은 컨텍스트 단위 허용 목록으로 차단하고 요청 수/바이트 집계
+    policy = RequestPolicy.load(request_policy, "web")
+
+    # 브라우저는 한 번만 띄우고, 브랜드 페이지는 페이지 풀 크기만큼 동시에 수집
+    async with async_playwright() as p:
+        # AUTOSCRAP_BROWSER_SERVICE가 설정되어 있으면 상시 실행 브라우저에 연결 (launch 비용 없음)
+        browser = await browser_service.launch(p, headless=True, args=['--disable-gpu', '--disable-dev-shm-usage', '--no-sandbox'])
+        try:
+            context = await recording.new_context(browser, "web")
+            await policy.apply(context)
+            page_pool = asyncio.Queue()
+            for _ in range(max(1, min(concurrency, len(targets)))):
+                page = await context.new_page()
+                page_pool.put_nowait(page)
+
+            results = await asyncio.gather(*[
+                scrape_brand_page(page_pool, brand, url)
+                for brand, url in targets
+            ])
+            # 기록 모드에서는 컨텍스트를 닫아야 HAR 파일이 저장됨
+            await context.close()
+        finally:
+            await browser.close()
+            policy.log_summary()
+
+    # gather 결과는 URL 순서를 유지하므로 저장 순서도 항상 같음
+    for brand_results in results:
+        all_results.extend(brand_results)
+
     today = datetime.now().strftime("%Y%m%d")
     file_path = f"data/etc/car_data_web_{today}.xlsx"
+    if brands:
+        # 나머지 브랜드 행과 합쳐 BRAND_ORDER 순서로 저장 (같은 브랜드 안에서는 수집 순서 유지)
+        rank = {brand: n for n, brand in enumerate(BRAND_ORDER)}
+        all_results = sorted(load_other_brands(file_path, brands) + all_results, key=lambda r: rank.get(r.brand, len(rank)))
+
+    df = records_to_frame(all_results, WebRecord)
 
     # 이미 파일이 존재하더라도 새 데이터로 덮어쓰기 (기존 데이터는 버림)
-    with pd.ExcelWriter(file_path, engine="openpyxl", mode="w") as writer:
-        df.to_excel(writer, index=False)
+    with METRICS.timer("excel_write", file="web"):
+        with pd.ExcelWriter(file_path, engine="openpyxl", mode="w") as writer:
+            df.to_excel(writer, index=False)
 
     logging.info(f"💾 {file_path} 저장 완료. 총 {len(df)}행 (기존 데이터 덮어씀).")
 
+    # 히스토리 저장소에도 숫자형으로 누적 (실패해도 엑셀 결과는 유지)
+    try:
+        history_store.save_web_snapshot(today, df)
+    except Exception as e:
+        logging.error(f"❌ 히스토리 저장 실패: {e}")
+    return df
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='GETCHA 웹 할인 데이터 수집')
+    parser.add_argument('--parser', choices=BACKENDS, default=DEFAULT_BACKEND, help='HTML 파서 (lxml/selectolax는 설치된 경우에만 사용)')
+    parser.add_argument('--concurrency', type=int, default=3, help='동시에 여는 브랜드 페이지 수')
+    parser.add_argument('--request-policy', type=str, help='요청 허용 목록 JSON (기본값: src/request_policy.json)')
+    parser.add_argument('--brands', type=parse_brands, help='수집할 브랜드 (쉼표 구분, 나머지 브랜드는 오늘 파일의 행 유지)')
+    parser.add_argument('--record', type=str, help='HAR/HTML을 기록할 폴더 (오프라인 재생/벤치마크용)')
+    parser.add_argument('--replay', type=str, help='기록된 HAR로만 실행 (사이트 접속 없음)')
+
+    args = parser.parse_args()
+    set_default_backend(args.parser)
+    recording.set_mode(record=args.record, replay=args.replay)
+
     ensure_directories()
-    asyncio.run(scrape_all_sections())
+    asyncio.run(scrape_all_sections(concurrency=args.concurrency, request_policy=args.request_policy, brands=args.brands))
+    METRICS.write_run_report("web")
 
     today = datetime.now().strftime("%Y%m%d")
     try:
@@ -159,4 +231,4 @@ if __name__ == "__main__":
         else:
             logging.warning("데이터 비교 모듈을 찾을 수 없어 비교를 수행하지 않습니다.")
     except Exception as e:
-        logging.error(f"데이터 비교 중 오류 발생: {e}")
\ No newline at end of file
+        logging.error(f"데이터 비교 중 오류 발생: {e}")
\ No newline at end of file
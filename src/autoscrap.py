@@ -6,8 +6,22 @@ import re
 import logging
 import sys
 from datetime import datetime
-from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+import urllib.request
+from scrap_journal import RowJournal, Checkpoint, journal_path
+from records import AppRecord, Brand, Fuel, BRAND_ORDER, records_to_frame, to_int
+from sharding import Shard, parse_brands, selected_brands, tag_logs, spawn_shards
+from payload_capture import PayloadCapture
+import history_store
+import recording
+import browser_service
+from metrics import METRICS
+from frame_registry import frame_registry
+from request_policy import RequestPolicy
+from waits import retry_policy, backoff_delay, wait_until_ready, load_retry_policy
+from series_fingerprint import SeriesFingerprints, fingerprint_series, DEFAULT_FULL_EVERY
+from html_parser import parse_html, set_default_backend, BACKENDS, DEFAULT_BACKEND
+from script_loader import load_script
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,365 +31,784 @@ logging.basicConfig(
     ]
 )
 
+# 실행 옵션 (__main__에서 명령행 인자로 덮어씀)
+SETTINGS = {
+    # click: 모델마다 클릭 + 뒤로가기 / pool: 상세 URL을 모아 페이지 풀에서 직접 이동 / http: HTTP로 먼저 시도 후 페이지 풀
+    "detail_mode": "click",
+    "detail_pool": 4,
+    # dom: 렌더링된 HTML 파싱 / api: page.on("response")로 받은 JSON 우선, 없으면 DOM
+    "backend": "dom",
+    # 증분 수집: 시리즈 모델 목록 지문이 직전 수집일과 같으면 상세 수집 없이 직전 결과 사용
+    "incremental": False,
+    "full_every": DEFAULT_FULL_EVERY,
+    # 요청 허용 목록 JSON 경로 (None이면 src/request_policy.json)
+    "request_policy": None,
+    # --shard k/N: 이 프로세스가 맡은 샤드 (None이면 전체)
+    "shard": None,
+}
+
+DETAIL_PRICE_SELECTOR = "div.sc-68368f62-0.gfdAnO"
+SERIES_ITEM_SELECTOR = '[class="css-175oi2r r-1i6wzkk r-lrvibr r-1loqt21 r-1otgn73 r-1awozwy r-18u37iz r-1wtj0ep r-117bsoe r-11wrixw r-61z16t r-1x0uki6 r-1mdbw0j r-1hfyk0a r-1qfoi16 r-wk8lta r-13qz1uu"]'
+SERIES_NAME_SELECTOR = 'div[class="css-146c3p1 r-1jstmqa r-litx2b r-1b43r93 r-icto9i r-14yzgew r-p76n7o r-13wfysu r-1a2p6p6"]'
+MODEL_ITEM_SELECTOR = "div.sc-80108d2f-0.hlytKE"
+MOBILE_USER_AGENT = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
+
 def ensure_directories():
     os.makedirs("src", exist_ok=True)
     os.makedirs("data", exist_ok=True)
+    os.makedirs("data/journal", exist_ok=True)
 
 def load_urls():
     with open("src/urls.json") as f:
         data = json.load(f)
     return data["url"]
 
-def load_existing_data():
+def get_excel_path(date=None):
+    if date is None:
+        date = datetime.now().strftime("%Y%m%d")
+    return f"data/car_data_{date}.xlsx"
+
+def save_to_excel(rows, date=None):
+    date = date or datetime.now().strftime("%Y%m%d")
+    file_path = get_excel_path(date)
+
+    # rows: [AppRecord] → 금액은 Int64, 브랜드/연료는 category 컬럼으로 한 번에 변환
+    df = records_to_frame(rows)
+
+    # 수집 중에는 저널에만 기록하고, 엑셀은 실행 마지막에 한 번만 작성
+    with METRICS.timer("excel_write", file="app"):
+        with pd.ExcelWriter(file_path, engine="openpyxl", mode="w") as writer:
+            df.to_excel(writer, index=False)
+
+    logging.info(f"💾 {file_path} 저장 완료. 총 {len(df)}행.")
+
+    # 히스토리 저장소에도 숫자형으로 누적 (실패해도 엑셀 결과는 유지)
     try:
-        df = pd.read_excel("car_data.xlsx")
-        return df
-    except FileNotFoundError:
-        df = pd.DataFrame(
-            columns=[
-                "Year", "Month", "Date", "Brand", "MY",
-                "Series", "Fuel Type", "Model (adjusted)",
-                "MSRP", "Cash_off", "Finance_off"
-            ]
-        )
-        return df
-
-def save_to_excel(new_data, append=False):
-    today = datetime.now().strftime("%Y%m%d")
-    file_path = f"data/car_data_{today}.xlsx"
-    columns = [
-        "Year", "Month", "Date", "Brand", "MY",
-        "Series", "Fuel Type", "Model (adjusted)",
-        "MSRP", "Cash_off", "Finance_off"
-    ]
-    
-    new_df = pd.DataFrame(new_data, columns=columns)
-    
-    # 이미 파일이 존재하고 append 모드라면 기존 데이터에 추가
-    if append and os.path.exists(file_path):
-        try:
-            existing_df = pd.read_excel(file_path)
-            updated_df = pd.concat([existing_df, new_df], ignore_index=True)
-            
-            with pd.ExcelWriter(file_path, engine="openpyxl", mode="w") as writer:
-                updated_df.to_excel(writer, index=False)
-                
-            logging.info(f"💾 {file_path}에 {len(new_df)}행 추가됨. 총 {len(updated_df)}행.")
-            return
-        except Exception as e:
-            logging.error(f"❌ 기존 파일 읽기/추가 실패, 덮어쓰기로 진행합니다: {e}")
-    
-    # 첫 실행이거나 append 모드가 아니면 덮어쓰기
-    with pd.ExcelWriter(file_path, engine="openpyxl", mode="w") as writer:
-        new_df.to_excel(writer, index=False)
-    
-    logging.info(f"💾 {file_path} 저장 완료. 총 {len(new_df)}행.")
+        history_store.save_app_snapshot(date, df)
+    except Exception as e:
+        logging.error(f"❌ 히스토리 저장 실패: {e}")
+    return df
 
 def fuel_type(x):
     if "휘발유" in x:
-        return "P"
+        return Fuel.PETROL
     elif "경유" in x:
-        return "D"
+        return Fuel.DIESEL
     elif "전기" in x:
-        return "BEV"
+        return Fuel.BEV
     elif "플러그인 하이브리드" in x:
-        return "PHEV"
+        return Fuel.PHEV
     else:
-        return "None"
+        return Fuel.NONE
 
-async def get_car_series(page, brand, is_first_brand=False):
-    await page.wait_for_load_state("load")
-    content = await page.content()
-    soup = BeautifulSoup(content, "html.parser")
+@METRICS.measure("parse", extractor="series_names")
+def extract_series_names(content):
+    root = parse_html(content)
 
-    elements = soup.find_all(
-        class_="css-175oi2r r-1i6wzkk r-lrvibr r-1loqt21 r-1otgn73 r-1awozwy r-18u37iz r-1wtj0ep r-117bsoe r-11wrixw r-61z16t r-1x0uki6 r-1mdbw0j r-1hfyk0a r-1qfoi16 r-wk8lta r-13qz1uu"
-    )
-    if not elements:
-        logging.warning(f"{brand} 시리즈 요소를 찾지 못했습니다.")
-        return []
-
-    today = datetime.now()
-    all_series_data = []  # 모든 시리즈 데이터를 저장할 리스트
+    elements = root.select(SERIES_ITEM_SELECTOR)
 
+    series_names = []
     for element in elements:
         try:
-            car_series = element.find(
-                "div",
-                class_="css-146c3p1 r-1jstmqa r-litx2b r-1b43r93 r-icto9i r-14yzgew r-p76n7o r-13wfysu r-1a2p6p6",
-            ).get_text(strip=True)
+            car_series = element.select_one(SERIES_NAME_SELECTOR).text()
         except Exception:
             continue
+        series_names.append(car_series)
+    return series_names
 
-        logging.info(f"시리즈 탐색 중: {car_series}")
+async def get_car_series(page, brand, journal, checkpoint=None, capture=None, fingerprints=None, failed_series=None):
+    # failed_series: 모델 목록을 열지 못한 시리즈 이름을 추가할 리스트 (브랜드 완료 표시 여부 판단용)
+    # 시리즈 목록이 준비됐는지는 scrape_brand에서 이미 확인함
+    # 시리즈 목록은 항상 DOM 기준 (클릭할 수 있는 이름이어야 하므로). api 백엔드는 응답의 시리즈명과 대조만 함
+    content = await page.content()
+    recording.snapshot("series", brand, content)
+    series_names = extract_series_names(content)
+    if capture and series_names:
+        matched = set(capture.series_names()) & set(series_names)
+        logging.info(f"📡 {brand} 시리즈 {len(series_names)}개 중 {len(matched)}개가 API 응답과 일치")
+
+    if not series_names:
+        logging.warning(f"{brand} 시리즈 요소를 찾지 못했습니다.")
+        return []
+
+    shard = SETTINGS["shard"]
+    if shard:
+        # 시리즈 단위로 나누는 브랜드는 이 샤드에 할당된 시리즈만 수집
+        owned = [car_series for car_series in series_names if shard.owns_series(brand, car_series)]
+        if len(owned) < len(series_names):
+            logging.info(f"🧩 {brand} 시리즈 {len(series_names)}개 중 {len(owned)}개가 샤드 {shard}에 할당됨")
+        if not owned:
+            # 수집할 것이 없는 것이지 실패가 아니므로 None (재시도하지 않음)
+            return None
+        series_names = owned
+
+    all_series_data = []  # 모든 시리즈 데이터를 저장할 리스트
 
-        existing_data = load_existing_data()
-        
+    for car_series in series_names:
+        logging.info(f"시리즈 탐색 중: {car_series}")
 
-        if not existing_data[
-            (existing_data["Year"] == today.year)
-            & (existing_data["Month"] == today.month)
-            & (existing_data["Date"] == today.day)
-            & (existing_data["Series"] == car_series)
-        ].empty:
+        # 오늘 이미 수집된 시리즈는 저널 인덱스에서 바로 확인 (엑셀 재파싱 없음)
+        if journal.is_done(brand, car_series):
             logging.info(f"⏩ {car_series} 이미 수집됨. 스킵.")
+            all_series_data.extend(journal.done_rows(brand, car_series))
             continue
 
         # 각 시리즈 데이터 수집
-        series_data = await get_car_info(page, car_series, brand)
+        with METRICS.unit("series", brand, car_series) as unit:
+            series_data = await get_car_info(page, car_series, brand, checkpoint, capture, fingerprints)
+            unit["rows"] = len(series_data or [])
+        if series_data is None and failed_series is not None:
+            failed_series.append(car_series)
         if series_data:
             logging.info(f"✅ {car_series} 수집 완료, {len(series_data)}개 항목 수집")
             all_series_data.extend(series_data)  # 전체 데이터 리스트에 추가
-            
-            # 시리즈 수집 후 바로 저장 (첫 번째 브랜드의 첫 번째 시리즈는 덮어쓰기, 나머지는 추가)
-            append_mode = not (is_first_brand and len(all_series_data) == len(series_data))
-            save_to_excel(series_data, append=append_mode)
-            logging.info(f"💾 {car_series} 데이터 {len(series_data)}개 항목 저장 완료")
+
+            # 시리즈 수집 후 바로 저널에 기록 (엑셀 변환은 실행 마지막에 한 번만)
+            journal.append_series(brand, car_series, series_data)
+            logging.info(f"💾 {car_series} 데이터 {len(series_data)}개 항목 저널 기록 완료")
         else:
             logging.warning(f"⚠️ {car_series} 수집된 데이터 없음")
-
-        await page.wait_for_load_state("load")
+        # 다음 시리즈 클릭은 Playwright가 요소가 클릭 가능해질 때까지 자동으로 기다리므로 별도 대기 없음
 
     return all_series_data
 
-async def get_car_info(page, car_series, brand):
+@METRICS.measure("parse", extractor="model_records")
+def extract_model_records(content, root=None):
+    # root: 이미 파싱한 문서를 넘기면 다시 파싱하지 않음 (get_car_info에서 지문 계산과 공유)
+    if root is None:
+        root = parse_html(content)
+
+    # DOM 트리 순회 대신 직접 선택
+    records = []
+    all_h5s = root.select("h5.sc-850306bd-6.DcjFc")
+    for h5 in all_h5s:
+        parent_div = h5.find_parent("div", "sc-80108d2f-0")
+        if not (parent_div and "hlytKE" in parent_div.classes and "kwqkHl" not in parent_div.classes):
+            continue
+
+        car_model = h5.text()
+
+        # 가장 가까운 부모 블록 기준으로 검색
+        fuel_parent_block = h5.find_parent("div", "sc-84b91bcb-0 fscxQt")
+        year_parent_block = h5.find_parent("div", "sc-16e7f35c-0 iTBJvM")
+
+        car_year_tag = year_parent_block.select_one("div.sc-16e7f35c-1.bEkQLM h4.sc-850306bd-5.iXDDjz") if year_parent_block else None
+        car_year = car_year_tag.text()[2:4] if car_year_tag else "00"
+
+        car_fuel_tag = fuel_parent_block.select_one("div.sc-84b91bcb-1.dpHZpA h6.sc-850306bd-8.bcvqMy") if fuel_parent_block else None
+        car_fuel = fuel_type(car_fuel_tag.text()) if car_fuel_tag else Fuel.UNKNOWN
+
+        records.append({"index": len(records), "model": car_model, "year": car_year, "fuel": car_fuel})
+    return records
+
+async def drill_models_direct(page, elements_locator, pending, records, car_series, brand, checkpoint, results):
+    # 상세 URL을 한 번에 모아 직접 이동으로 처리하고, 처리하지 못한 index만 반환 (클릭 방식으로 대체)
+    detail_urls = await collect_detail_urls(elements_locator)
+
+    jobs = [
+        (i, detail_urls[i], records[i])
+        for i in pending
+        if i < len(detail_urls) and detail_urls[i] and i < len(records)
+    ]
+    if not jobs:
+        logging.info(f"ℹ️ {car_series} 상세 URL을 찾지 못해 클릭 방식으로 진행")
+        return pending
+
+    logging.info(f"🔗 {car_series} 상세 URL {len(jobs)}/{len(pending)}개 직접 이동 ({SETTINGS['detail_mode']})")
+    fetched = await fetch_details_direct(page.context, jobs, car_series, brand)
+
+    for i, model_data in fetched.items():
+        if model_data is None:
+            continue
+        results[i] = model_data
+        if checkpoint:
+            checkpoint.mark_model(brand, car_series, i, records[i]["model"], model_data)
+
+    return [i for i in pending if i not in results]
+
+async def get_car_info(page, car_series, brand, checkpoint=None, capture=None, fingerprints=None):
     try:
         series_locator = page.locator(f"text={car_series}").first
         await series_locator.click()
-        await page.wait_for_load_state("load")
 
         # 브랜드 페이지 iframe 접근
         if "5" in car_series:
-            elements_locator = page.locator("div.sc-80108d2f-0.hlytKE")
+            elements_locator = page.locator(MODEL_ITEM_SELECTOR)
         else: 
             brand_iframe_locator = page.frame_locator("iframe[src*='https://cd.getcha.kr/brand/']")
-            elements_locator = brand_iframe_locator.locator("div.sc-80108d2f-0.hlytKE")
+            elements_locator = brand_iframe_locator.locator(MODEL_ITEM_SELECTOR)
 
-        await elements_locator.first.wait_for(timeout=3000)
+        # 시리즈 클릭 후 페이지 전체 load 대신 모델 목록이 나타날 때까지만 대기
+        await METRICS.track("wait_for_models", elements_locator.first.wait_for(timeout=3000), brand=brand)
 
         count = await elements_locator.count()
         if count == 0:
             logging.warning(f"⚠️ 할인되는 {car_series} 모델 없음. 다음 시리즈로 이동.")
             return []
 
-        series_car_data = []
-
+        # 모델 목록(이름/연식/연료)은 시리즈마다 한 번만 파싱하고, 클릭 루프는 이 목록을 기준으로 진행
+        with METRICS.timer("iframe_lookup", frame="brand"):
+            brand_frame = frame_registry(page).get("brand")
+        if not brand_frame:
+            logging.error(f"❌ {car_series} 브랜드 iframe 로드 실패")
+            await METRICS.track("go_back", page.go_back(), brand=brand)
+            return None
+        brand_content = await brand_frame.content()
+        recording.snapshot("models", f"{brand}_{car_series}", brand_content)
+        # 브랜드 iframe은 시리즈마다 한 번만 파싱해 모델 목록과 지문 계산에 같이 사용
+        with METRICS.timer("parse", extractor="brand_iframe"):
+            brand_root = parse_html(brand_content)
+        car_model_records = extract_model_records(brand_content, brand_root)
+
+        fingerprint = None
+        if fingerprints is not None:
+            fingerprint = fingerprint_series(brand_root, car_model_records)
+            if SETTINGS["incremental"]:
+                carried = fingerprints.carry_forward(brand, car_series, fingerprint)
+                if carried is not None:
+                    logging.info(f"🧬 {car_series} 모델 목록 변화 없음, {fingerprints.prev_date} 결과 {len(carried)}개 재사용")
+                    METRICS.count("series_carried", brand=brand)
+                    await METRICS.track("go_back", page.go_back(), brand=brand)
+                    return carried
+
+        results = {}  # 모델 index -> row ([]: 할인 없음)
+        pending = []
         for i in range(count):
-            try:
-                el = elements_locator.nth(i)
-                await el.scroll_into_view_if_needed()
-                await page.wait_for_load_state("load")
-
-                # iframe 전체 HTML 파싱
-                brand_frame = next((f for f in page.frames if "https://cd.getcha.kr/brand/" in f.url), None)
-                if not brand_frame:
-                    raise Exception("❌ 브랜드 iframe 로드 실패")
-
-                content = await brand_frame.content()
-                soup = BeautifulSoup(content, "html.parser")
-                
-                # DOM 트리 순회 대신 직접 선택
-                car_model_tags = []
-                all_h5s = soup.select("h5.sc-850306bd-6.DcjFc")
-                for h5 in all_h5s:
-                    parent_div = h5.find_parent("div", class_="sc-80108d2f-0")
-                    if parent_div and "hlytKE" in parent_div["class"] and "kwqkHl" not in parent_div["class"]:
-                        car_model_tags.append(h5)
-
-                if i >= len(car_model_tags):
-                    raise Exception("❌ car_model 엘리먼트 부족")
-
-                car_model_tag = car_model_tags[i]
-                car_model = car_model_tag.get_text(strip=True)
-
-                # 가장 가까운 부모 블록 기준으로 검색
-                fuel_parent_block = car_model_tag.find_parent("div", class_="sc-84b91bcb-0 fscxQt")
-                year_parent_block = car_model_tag.find_parent("div", class_="sc-16e7f35c-0 iTBJvM")
-
-                car_year_tag = year_parent_block.select_one("div.sc-16e7f35c-1.bEkQLM h4.sc-850306bd-5.iXDDjz")
-                car_year = car_year_tag.get_text(strip=True)[2:4] if car_year_tag else "00"
-
-                car_fuel_tag = fuel_parent_block.select_one("div.sc-84b91bcb-1.dpHZpA h6.sc-850306bd-8.bcvqMy")
-                car_fuel = fuel_type(car_fuel_tag.get_text(strip=True)) if car_fuel_tag else "Unknown"
-
-
-                logging.info(f"{car_series} - {car_model} ({car_year}) {car_fuel}")
-                await el.click()
-                await page.wait_for_load_state("domcontentloaded")
-
-                model_data = await get_car_price(page, car_model, car_series, car_year, car_fuel, brand)
-                if model_data:
-                    series_car_data.append(model_data)
-
-            except Exception as e:
-                logging.warning(f"⚠️ {car_series} 모델 {i+1}/{count} 처리 실패: {e}")
-
-            finally:
+            # --resume: 이전 실행에서 이미 처리한 모델은 클릭/뒤로가기 없이 기록된 결과를 재사용
+            # (같은 위치의 모델명이 기록과 일치할 때만. 아직 목록에 보이지 않는 위치는 확인할 수 없으므로 다시 수집)
+            model = car_model_records[i]["model"] if i < len(car_model_records) else None
+            if checkpoint and model is not None and checkpoint.model_done(brand, car_series, i, model):
+                results[i] = checkpoint.model_row(brand, car_series, i)
+            else:
+                pending.append(i)
+
+        if SETTINGS["detail_mode"] != "click" and pending:
+            pending = await drill_models_direct(page, elements_locator, pending, car_model_records, car_series, brand, checkpoint, results)
+
+        for i in pending:
+            with METRICS.unit("model", brand, car_series) as unit:
                 try:
-                    if not page.is_closed():
-                        await page.go_back()
-                        await page.wait_for_load_state("load")
+                    el = elements_locator.nth(i)
+                    await el.scroll_into_view_if_needed()
+
+                    if i >= len(car_model_records):
+                        # 스크롤 후에야 렌더링되는 모델이 있는 경우에만 iframe을 다시 파싱
+                        brand_frame = frame_registry(page).get("brand")
+                        if brand_frame:
+                            car_model_records = extract_model_records(await brand_frame.content())
+
+                    if i >= len(car_model_records):
+                        raise Exception("❌ car_model 엘리먼트 부족")
+
+                    record = car_model_records[i]
+                    car_model, car_year, car_fuel = record["model"], record["year"], record["fuel"]
+                    unit["model"] = car_model
+
+                    logging.info(f"{car_series} - {car_model} ({car_year}) {car_fuel}")
+                    since = capture.mark() if capture else 0
+                    # 클릭 후 상세 iframe/가격 영역은 get_car_price에서 해당 요소로 대기
+                    await el.click()
+
+                    model_data = await get_car_price(page, car_model, car_series, car_year, car_fuel, brand, capture, since)
+                    if model_data is not None:
+                        results[i] = model_data
+                    else:
+                        unit["status"] = "no_price"
+                    # None은 가격 파싱 실패이므로 체크포인트에 남기지 않고 재개 시 다시 시도
+                    if checkpoint and model_data is not None:
+                        checkpoint.mark_model(brand, car_series, i, car_model, model_data)
+
                 except Exception as e:
-                    logging.warning(f"⚠️ 뒤로가기 실패: {e}")
-        await page.go_back()
+                    unit["status"] = "error"
+                    unit["error"] = str(e)
+                    logging.warning(f"⚠️ {car_series} 모델 {i+1}/{count} 처리 실패: {e}")
+
+                finally:
+                    try:
+                        if not page.is_closed():
+                            # go_back은 이전 페이지 load까지 기다리므로 추가 load 대기 없음
+                            await METRICS.track("go_back", page.go_back(), brand=brand)
+                    except Exception as e:
+                        logging.warning(f"⚠️ 뒤로가기 실패: {e}")
+        await METRICS.track("go_back", page.go_back(), brand=brand)
+        series_car_data = [results[i] for i in range(count) if results.get(i)]
+
+        # 모든 모델을 처리한 경우에만 지문 기록 (일부 실패한 결과를 다음 날 그대로 이어 쓰지 않도록)
+        if fingerprint and all(i in results for i in range(count)):
+            fingerprints.record(brand, car_series, fingerprint, series_car_data)
         return series_car_data
 
     except PlaywrightTimeoutError:
+        METRICS.count("timeouts", step="series", brand=brand)
         logging.error(f"❌ {car_series} 모델 클릭 실패 또는 요소 로드 실패")
         try:
             if not page.is_closed():
                 await page.go_back()
-                await page.wait_for_load_state("load")
         except:
             pass
-        return []
+        # 할인 모델이 없는 것([])과 구분해 None (이 시리즈가 끝나지 않았으므로 브랜드를 완료로 표시하지 않음)
+        return None
 
 
-async def get_car_price(frame, car_model, car_series, car_year, car_fuel, brand):
+async def find_detail_frame(page):
+    # car-detail iframe은 페이지의 FrameRegistry가 frame 이벤트로 추적하므로 프레임마다 src를 조회하지 않음
     try:
-        await frame.wait_for_selector("iframe[src*='car-detail']", timeout=10000)
-        await frame.wait_for_load_state("load")
+        return await METRICS.track("iframe_lookup", frame_registry(page).wait_for("detail", timeout=10000), frame="detail")
+    except asyncio.TimeoutError:
+        raise Exception("❌ car-detail iframe을 찾을 수 없음")
+
+async def wait_for_detail_price(frame, brand):
+    detail_frame = await find_detail_frame(frame)
+    await METRICS.track("wait_for_price", detail_frame.wait_for_selector(DETAIL_PRICE_SELECTOR, timeout=6000), brand=brand)
+    return detail_frame
+
+@METRICS.measure("parse", extractor="car_price")
+def parse_car_price(content, car_model, car_series, car_year, car_fuel, brand):
+    root = parse_html(content)
+
+    # 가격 영역이 없는 문서 (HTTP 응답이 클라이언트 렌더링 전 껍데기인 경우 등)
+    if not root.select_one(DETAIL_PRICE_SELECTOR):
+        return None
+
+    msrp_element = root.select_one("#cardetail_container > div.sc-68368f62-0.gfdAnO > div > div:nth-child(1) > div")
+    cash_off_element = root.select_one("#cardetail_container > div.sc-68368f62-0.gfdAnO > div > div:nth-child(2) > em")
+    finance_off_element = root.select_one("#cardetail_container > div.sc-68368f62-0.gfdAnO > div > div:nth-child(3) > em")
+
+    # 금액은 만원 단위 정수 (출고가를 찾지 못하면 None)
+    msrp = to_int(msrp_element.text()) if msrp_element else None
+    cash_off = to_int(re.search(r"([0-9,]+)만원", cash_off_element.text()).group(1)) if cash_off_element else 0
+    finance_off = to_int(re.search(r"([0-9,]+)만원", finance_off_element.text()).group(1)) if finance_off_element else 0
+
+    return build_price_row(msrp, cash_off, finance_off, car_model, car_series, car_year, car_fuel, brand)
+
+def build_price_row(msrp, cash_off, finance_off, car_model, car_series, car_year, car_fuel, brand):
+    msrp_text = f"{msrp:,}" if msrp is not None else "N/A"
+    logging.info(f"가격: {msrp_text}만원, 현금할인: {cash_off:,}만원, 금융할인: {finance_off:,}만원")
+
+    if cash_off or finance_off:
+        now = datetime.now()
+        return AppRecord(
+            now.year,
+            now.month,
+            now.day,
+            Brand.parse(brand),
+            car_year,
+            car_series,
+            car_fuel,
+            car_model,
+            msrp,
+            cash_off,
+            finance_off,
+        )
+    # 할인 없는 모델 (파싱 실패 시의 None과 구분)
+    return []
 
-        detail_frame = None
-        for f in frame.frames:
-            try:
-                el = await f.frame_element()
-                src = await el.get_attribute("src")
-                if src and "car-detail" in src:
-                    detail_frame = f
-                    break
-            except:
-                continue
+async def get_car_price(frame, car_model, car_series, car_year, car_fuel, brand, capture=None, since=0):
+    try:
+        detail_ready = asyncio.ensure_future(wait_for_detail_price(frame, brand))
+        # api 백엔드: 클릭 이후 도착한 JSON 응답과 DOM 가격 영역 표시 중 먼저 오는 쪽을 사용
+        # (일치하는 응답이 없는 모델도 DOM이 준비되면 바로 DOM 파싱으로 넘어가므로 따로 기다리지 않음)
+        if capture is not None:
+            price = await capture.wait_for_price(car_model, since=since, until=detail_ready)
+            if price is not None:
+                detail_ready.cancel()
+                detail_ready.add_done_callback(lambda task: task.cancelled() or task.exception())
+                msrp, cash_off, finance_off = price
+                return build_price_row(msrp, cash_off, finance_off, car_model, car_series, car_year, car_fuel, brand)
+            logging.info(f"ℹ️ {car_model} 일치하는 API 응답 없음, DOM 파싱으로 대체")
+
+        detail_frame = await detail_ready
+        content = await detail_frame.content()
+        recording.snapshot("detail", f"{brand}_{car_series}_{car_model}", content)
+        return parse_car_price(content, car_model, car_series, car_year, car_fuel, brand)
+    except Exception as e:
+        logging.error(f"❌ {car_model} 가격 파싱 실패: {e}")
+    return None
 
-        if not detail_frame:
-            raise Exception("❌ car-detail iframe을 src 기반으로 찾을 수 없음")
+async def get_car_price_direct(page, detail_url, car_model, car_series, car_year, car_fuel, brand):
+    # 브랜드 페이지에서 클릭하지 않고 상세 URL로 바로 이동해 가격 파싱
+    try:
+        await METRICS.track("goto", page.goto(detail_url, timeout=60000), brand=brand, target="detail")
+        if "car-detail" in page.url:
+            detail_frame = page.main_frame
+        else:
+            detail_frame = await find_detail_frame(page)
 
-        await detail_frame.wait_for_selector("div.sc-68368f62-0.gfdAnO", timeout=6000)
+        await detail_frame.wait_for_selector(DETAIL_PRICE_SELECTOR, timeout=6000)
         content = await detail_frame.content()
-        soup = BeautifulSoup(content, "html.parser")
-
-        msrp_element = soup.select_one("#cardetail_container > div.sc-68368f62-0.gfdAnO > div > div:nth-child(1) > div")
-        cash_off_element = soup.select_one("#cardetail_container > div.sc-68368f62-0.gfdAnO > div > div:nth-child(2) > em")
-        finance_off_element = soup.select_one("#cardetail_container > div.sc-68368f62-0.gfdAnO > div > div:nth-child(3) > em")
-
-        msrp = msrp_element.get_text(strip=True).replace("만원", "") if msrp_element else "N/A"
-        cash_off = re.search(r"([0-9,]+)만원", cash_off_element.get_text(strip=True)).group(1).replace(",", "") if cash_off_element else "0"
-        finance_off = re.search(r"([0-9,]+)만원", finance_off_element.get_text(strip=True)).group(1).replace(",", "") if finance_off_element else "0"
-
-        cash_off = f"{int(cash_off):,}"
-        finance_off = f"{int(finance_off):,}"
-
-        logging.info(f"가격: {msrp}만원, 현금할인: {cash_off}만원, 금융할인: {finance_off}만원")
-
-        if cash_off != "0" or finance_off != "0":
-            return [
-                datetime.now().year,
-                datetime.now().month,
-                datetime.now().day,
-                brand,
-                car_year,
-                car_series,
-                car_fuel,
-                car_model,
-                msrp,
-                cash_off,
-                finance_off,
-            ]
+        return parse_car_price(content, car_model, car_series, car_year, car_fuel, brand)
     except Exception as e:
-        logging.error(f"❌ {car_model} 가격 파싱 실패: {e}")
+        logging.error(f"❌ {car_model} 상세 페이지 직접 이동 실패: {e}")
     return None
 
-def find_parent_with_class(element, class_name):
-    parent = element.parent
-    while parent:
-        if parent.name == "div" and class_name in parent.get("class", []):
-            return parent
-        parent = parent.parent
+def fetch_detail_html(detail_url):
+    request = urllib.request.Request(detail_url, headers={"User-Agent": MOBILE_USER_AGENT})
+    with urllib.request.urlopen(request, timeout=20) as response:
+        return response.read().decode("utf-8", errors="replace")
+
+async def get_car_price_http(detail_url, car_model, car_series, car_year, car_fuel, brand):
+    # 서버 렌더링된 HTML에 가격 영역이 있으면 브라우저 없이 처리, 없으면 None (페이지 풀로 대체)
+    try:
+        content = await asyncio.to_thread(fetch_detail_html, detail_url)
+        return parse_car_price(content, car_model, car_series, car_year, car_fuel, brand)
+    except Exception as e:
+        logging.warning(f"⚠️ {car_model} HTTP 상세 조회 실패, 브라우저로 대체: {e}")
     return None
 
-async def main():
+async def collect_detail_urls(elements_locator):
+    # 모델 요소(또는 그 안/바깥의 링크)에 걸린 상세 페이지 URL을 한 번에 수집. 못 찾으면 None
+    return await elements_locator.evaluate_all("""els => els.map(el => {
+        const link = el.closest('a[href]') || el.querySelector('a[href]');
+        if (link) return link.href;
+        for (const node of [el, ...el.querySelectorAll('*')]) {
+            for (const attr of node.attributes) {
+                if (attr.value.includes('car-detail')) return new URL(attr.value, document.baseURI).href;
+            }
+        }
+        return null;
+    })""")
+
+async def fetch_details_direct(context, jobs, car_series, brand):
+    # jobs: [(index, detail_url, record)] → {index: row 또는 None}
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    results = {}
+
+    async def worker():
+        page = None
+        try:
+            while not queue.empty():
+                i, detail_url, record = queue.get_nowait()
+                args = (record["model"], car_series, record["year"], record["fuel"], brand)
+
+                model_data = None
+                if SETTINGS["detail_mode"] == "http":
+                    model_data = await get_car_price_http(detail_url, *args)
+                if model_data is None:
+                    if page is None:
+                        # 요청 허용 목록은 컨텍스트에 이미 적용되어 있음
+                        page = await context.new_page()
+                    model_data = await get_car_price_direct(page, detail_url, *args)
+
+                logging.info(f"{car_series} - {record['model']} ({record['year']}) {record['fuel']} [직접 이동]")
+                results[i] = model_data
+        finally:
+            if page is not None:
+                await page.close()
+
+    pool_size = max(1, min(SETTINGS["detail_pool"], len(jobs)))
+    await asyncio.gather(*[worker() for _ in range(pool_size)])
+    return results
+
+async def scrape_brand(context, i, brand, url, journal, checkpoint=None, fingerprints=None):
+    # --resume: 이전 실행에서 끝난 브랜드는 페이지를 열지 않고 저널의 결과를 사용
+    if checkpoint and checkpoint.brand_done(brand):
+        logging.info(f"⏩ {brand} 이전 실행에서 수집 완료. 스킵.")
+        return journal.brand_rows(brand)
+
+    # 최대 시도 횟수, 재시도 대기, 페이지 준비 대기 시간은 브랜드별 정책 (waits.RETRY_POLICY)
+    policy = retry_policy(brand)
+    max_retries = policy["max_retries"]
+    retries = 0
+    brand_data = []
+
+    with METRICS.unit("brand", brand) as unit:
+        while retries < max_retries and len(brand_data) == 0:
+            if retries > 0:
+                logging.warning(f"⚠️ {brand} 데이터 수집 실패, {retries}번째 재시도 중...")
+                METRICS.count("retries", brand=brand)
+                delay = backoff_delay(policy, retries)
+                logging.info(f"⏳ {delay:.1f}초 후 재시도")
+                await METRICS.track("sleep", asyncio.sleep(delay), brand=brand, reason="retry")
+
+            page = await context.new_page()
+            # 첫 이동 전에 등록해야 브랜드/상세 iframe이 붙는 순간부터 추적됨
+            frame_registry(page)
+
+            capture = None
+            if SETTINGS["backend"] == "api":
+                # 페이지 이동 전에 등록해야 첫 로딩 때의 API 응답도 수집됨
+                capture = PayloadCapture.for_today(brand)
+                capture.attach(page)
+            try:
+                await METRICS.track("goto", page.goto(url, timeout=600000), brand=brand, target="brand")
+
+                # 고정 sleep 대신 시리즈 목록이 나타나고 개수가 더 늘지 않을 때까지만 대기
+                series_count = await METRICS.track(
+                    "wait_for_series",
+                    wait_until_ready(page.locator(f"{SERIES_ITEM_SELECTOR} {SERIES_NAME_SELECTOR}"), policy["ready_timeout"]),
+                    brand=brand,
+                )
+                logging.info(f"{brand} 시리즈 목록 준비됨 ({series_count}개)")
+
+                logging.info(f"\n====== 브랜드 시작: {brand} ({retries+1}번째 시도) ======")
+
+                # 브랜드별 데이터 수집 (시리즈마다 저널에 기록)
+                failed_series = []
+                brand_data = await get_car_series(page, brand, journal, checkpoint, capture, fingerprints, failed_series)
+
+                if brand_data is None:
+                    logging.info(f"⏩ {brand} 이 샤드에 할당된 시리즈 없음")
+                    brand_data = []
+                    unit["status"] = "skipped"
+                    break
+                elif len(brand_data) > 0:
+                    logging.info(f"✅ 브랜드 {brand} 데이터 {len(brand_data)}개 수집 완료")
+                    if failed_series:
+                        # 브랜드를 완료로 표시하지 않아야 --resume에서 다시 들어와 끝난 시리즈는 건너뛰고 실패한 시리즈만 수집
+                        logging.warning(f"⚠️ {brand} 시리즈 {len(failed_series)}개 수집 실패 ({', '.join(failed_series)}), --resume 시 다시 시도")
+                    elif checkpoint:
+                        checkpoint.mark_brand(brand)
+                    break  # 데이터가 수집되었으면 재시도 루프 종료
+                else:
+                    logging.warning(f"⚠️ {brand} 데이터 0개 수집됨, 재시도 필요")
+                    retries += 1
+
+            except Exception as e:
+                logging.error(f"❌ {brand} 오류 발생: {e}")
+                retries += 1
+            finally:
+                await page.close()
+
+        unit["rows"] = len(brand_data)
+        unit["attempts"] = retries + 1 if brand_data else retries
+        if len(brand_data) == 0 and unit["status"] != "skipped":
+            unit["status"] = "failed"
+            logging.error(f"❌ {brand} 데이터 수집 최종 실패. 다음 브랜드로 진행합니다.")
+
+    return brand_data
+
+async def scrape_brand_isolated(browser, semaphore, i, brand, url, journal, checkpoint=None, fingerprints=None, policy=None):
+    # 동시 실행 모드: 브랜드마다 별도 BrowserContext를 사용해 쿠키/히스토리가 섞이지 않도록 함
+    async with semaphore:
+        context = await recording.new_context(browser, f"app_{brand}")
+        if policy:
+            await policy.apply(context)
+        try:
+            return await scrape_brand(context, i, brand, url, journal, checkpoint, fingerprints)
+        finally:
+            await context.close()
+
+async def main(concurrency=1, fresh=False, resume=False, brands=None):
     ensure_directories()
     url = load_urls()
-    brand_map = {
-        1: "01_BMW",
-        2: "04_Mini",
-        3: "02_MB",
-        4: "03_Audi",
-        5: "12_Volkswagen",
-    }
+    # urls.json의 첫 URL은 검색 탭이므로 브랜드 URL은 두 번째부터 BRAND_ORDER 순서
+    brand_urls = dict(zip(BRAND_ORDER, url[1:]))
+
+    # --brands로 고른 브랜드 중 이 샤드가 맡은 브랜드만 (샤드가 없으면 전부)
+    shard = SETTINGS["shard"]
+    targets = [(BRAND_ORDER.index(brand) + 1, brand) for brand in selected_brands(brands, shard)]
+    logging.info(f"🏷️ 수집 대상 브랜드: {', '.join(str(brand) for _, brand in targets)}" + (f" (샤드 {shard})" if shard else ""))
 
     all_data = []
-    first_brand = True
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True, args=['--disable-gpu', '--disable-dev-shm-usage', '--no-sandbox'])
-        context = await browser.new_context()
-
-        for i in range(1, 6):
-            brand = brand_map[i]
-            max_retries = 5  # 최대 재시도 횟수
-            retries = 0
-            brand_data = []
-            
-            while retries < max_retries and len(brand_data) == 0:
-                if retries > 0:
-                    logging.warning(f"⚠️ {brand} 데이터 수집 실패, {retries}번째 재시도 중...")
-                    await asyncio.sleep(3)  # 재시도 전 잠시 대기
-                
-                page = await context.new_page()
-                # 페이지 생성 후 이미지, 스타일시트, 폰트 등 불필요한 리소스 차단
-                await page.route('**/*.{png,jpg,jpeg,svg,css,woff,woff2}', lambda route: route.abort())
-                try:
-                    await page.goto(url[i], timeout=600000)
-                    await page.wait_for_load_state("load")
-                    
-                    # BMW 브랜드는 더 오래 기다림
-                    if i == 1:  # BMW
-                        await asyncio.sleep(5)
-                    else:
-                        await asyncio.sleep(3)
-                    
-                    logging.info(f"\n====== 브랜드 시작: {brand} ({retries+1}번째 시도) ======")
-                    
-                    # 브랜드별 데이터 수집 (첫 번째 브랜드는 is_first_brand=True로 전달)
-                    brand_data = await get_car_series(page, brand, is_first_brand=first_brand)
-                    
-                    if len(brand_data) > 0:
-                        logging.info(f"✅ 브랜드 {brand} 데이터 {len(brand_data)}개 수집 완료")
-                        all_data.extend(brand_data)
-                        break  # 데이터가 수집되었으면 재시도 루프 종료
-                    else:
-                        logging.warning(f"⚠️ {brand} 데이터 0개 수집됨, 재시도 필요")
-                        retries += 1
-                        
-                except Exception as e:
-                    logging.error(f"❌ {brand} 오류 발생: {e}")
-                    retries += 1
-                finally:
-                    await page.close()
-            
-            if len(brand_data) == 0:
-                logging.error(f"❌ {brand} 데이터 수집 최종 실패. 다음 브랜드로 진행합니다.")
-            
-            first_brand = False  # 첫 번째 브랜드 처리 후 플래그 변경
+    # 샤드 실행은 자기 파티션 저널에만 기록하고, 일일 저널/엑셀은 병합 단계(--merge)에서 만듦
+    partition = shard.name if shard else None
+    journal = RowJournal(partition=partition)
+    checkpoint = Checkpoint(journal.date, partition=partition)
+    if fresh:
+        # 오늘 수집분을 버리고 처음부터 다시 수집
+        journal.reset()
+        checkpoint.reset()
+    else:
+        # 오늘 저널(또는 오늘 엑셀)에서 이미 수집된 시리즈를 한 번만 읽어 인덱스로 유지
+        if partition:
+            # 샤드는 일일 저널(이전 전체 실행/병합 결과)에서 자기가 맡은 브랜드/시리즈만 가져와 스킵
+            owned_brands = {brand for _, brand in targets}
+            journal.load_index(
+                seed_path=journal_path(journal.journal_dir, "car_data", journal.date),
+                owns=lambda brand, car_series: brand in owned_brands and shard.owns_series(brand, car_series),
+            )
+        else:
+            journal.load_index(get_excel_path(journal.date))
+        if resume:
+            # 브랜드/모델 단위 진행 상황까지 이어서 수집
+            checkpoint.load()
+        else:
+            checkpoint.reset()
 
-        await browser.close()
+    # 지문은 항상 기록하고 (다음 증분 실행의 기준), 직전 지문은 증분 모드에서만 읽음
+    fingerprints = SeriesFingerprints(journal.date, SETTINGS["full_every"])
+    if SETTINGS["incremental"]:
+        fingerprints.load()
 
-    logging.info(f"💾 전체 데이터 {len(all_data)}개 항목 수집 완료")
+    # 이미지/폰트/CSS/외부 도메인 요청은 컨텍스트 단위 허용 목록으로 차단하고 요청 수/바이트 집계
+    policy = RequestPolicy.load(SETTINGS["request_policy"], "app")
 
-    # autoscrap-web.py 실행
-    logging.info("\n=== autoscrap.py 완료. autoscrap-web.py 실행 중... ===")
     try:
-        # 하위 프로세스로 autoscrap-web.py 실행
-        import subprocess
-        web_script_path = os.path.join(os.path.dirname(__file__), 'autoscrap-web.py')
-        if os.path.exists(web_script_path):
-            subprocess.run([sys.executable, web_script_path], check=True)
-            logging.info("✅ autoscrap-web.py 실행 완료")
+        async with async_playwright() as p:
+            # AUTOSCRAP_BROWSER_SERVICE가 설정되어 있으면 상시 실행 브라우저에 연결 (launch 비용 없음)
+            browser = await browser_service.launch(p, headless=True, args=['--disable-gpu', '--disable-dev-shm-usage', '--no-sandbox'])
+            try:
+                if concurrency <= 1:
+                    context = await recording.new_context(browser, "app")
+                    await policy.apply(context)
+
+                    for i, brand in targets:
+                        brand_data = await scrape_brand(context, i, brand, brand_urls[brand], journal, checkpoint, fingerprints)
+                        all_data.extend(brand_data)
+                    # 기록 모드에서는 컨텍스트를 닫아야 HAR 파일이 저장됨
+                    await context.close()
+                else:
+                    logging.info(f"🚀 브랜드 동시 수집 모드 (동시 실행 수: {concurrency})")
+
+                    semaphore = asyncio.Semaphore(concurrency)
+                    results = await asyncio.gather(*[
+                        scrape_brand_isolated(browser, semaphore, i, brand, brand_urls[brand], journal, checkpoint, fingerprints, policy)
+                        for i, brand in targets
+                    ])
+                    # gather 결과는 BRAND_ORDER 순서를 유지
+                    for brand_data in results:
+                        all_data.extend(brand_data)
+            finally:
+                # 서비스에 연결한 경우 close()는 연결만 끊고 임대를 반납함
+                await browser.close()
+    finally:
+        # 저널 → 엑셀 변환은 실행 마지막에 한 번만 (브랜드 순서 고정, 동시 실행 시에도 결과가 결정적)
+        # 도중에 예외로 종료되더라도 이미 기록된 시리즈까지는 엑셀로 남김
+        if partition:
+            app_df = records_to_frame(journal.rows(BRAND_ORDER))
+            logging.info(f"🧩 샤드 {shard} 결과 {len(app_df)}행은 {journal.path}에 기록됨 (--merge로 일일 결과 생성)")
         else:
-            logging.error("❌ autoscrap-web.py 파일을 찾을 수 없습니다.")
-    except Exception as e:
-        logging.error(f"❌ autoscrap-web.py 실행 중 오류 발생: {e}")
+            app_df = save_to_excel(journal.rows(BRAND_ORDER))
+        fingerprints.flush()
+        policy.log_summary()
+
+    logging.info(f"💾 전체 데이터 {len(all_data)}개 항목 수집 완료")
+
+    return app_df
+
+async def refresh_series(brand, car_series):
+    # 시리즈 하나만 다시 수집해 오늘 저널/엑셀/히스토리의 해당 (brand, series) 행을 교체 (전체 실행 없이 수 초~수십 초)
+    ensure_directories()
+    brand = Brand.parse(brand)
+    if brand not in BRAND_ORDER:
+        raise ValueError(f"알 수 없는 브랜드: {brand}")
+    brand_url = dict(zip(BRAND_ORDER, load_urls()[1:]))[brand]
+
+    journal = RowJournal()
+    journal.load_index(get_excel_path(journal.date))
+    previous = journal.done_rows(brand, car_series)
+
+    fingerprints = SeriesFingerprints(journal.date, SETTINGS["full_every"])
+    policy = RequestPolicy.load(SETTINGS["request_policy"], "app")
+    retry = retry_policy(brand)
+
+    async with async_playwright() as p:
+        browser = await browser_service.launch(p, headless=True, args=['--disable-gpu', '--disable-dev-shm-usage', '--no-sandbox'])
+        try:
+            context = await recording.new_context(browser, f"app_refresh_{brand}")
+            await policy.apply(context)
+            page = await context.new_page()
+            frame_registry(page)
+
+            with METRICS.unit("series", brand, car_series) as unit:
+                await METRICS.track("goto", page.goto(brand_url, timeout=600000), brand=brand, target="brand")
+                await METRICS.track(
+                    "wait_for_series",
+                    wait_until_ready(page.locator(f"{SERIES_ITEM_SELECTOR} {SERIES_NAME_SELECTOR}"), retry["ready_timeout"]),
+                    brand=brand,
+                )
+                series_names = extract_series_names(await page.content())
+                if car_series not in series_names:
+                    raise ValueError(f"{brand}에 {car_series} 시리즈가 없습니다. 가능한 시리즈: {', '.join(series_names)}")
+
+                rows = await get_car_info(page, car_series, brand, fingerprints=fingerprints) or []
+                unit["rows"] = len(rows)
+            await context.close()
+        finally:
+            await browser.close()
+            fingerprints.flush()
+            policy.log_summary()
+
+    if not rows:
+        # 할인 모델이 없어진 것인지 로드 실패인지 구분할 수 없으므로 기존 행은 그대로 둠
+        logging.warning(f"⚠️ {brand} {car_series} 수집된 행 없음, 기존 {len(previous)}행 유지")
+        return {"brand": str(brand), "series": car_series, "rows": 0, "replaced": 0, "updated": False}
+
+    # 같은 키로 다시 기록하면 저널에서는 마지막 기록이 이전 기록을 대체 → 엑셀/히스토리도 교체된 결과로 다시 저장
+    journal.append_series(brand, car_series, rows)
+    save_to_excel(journal.rows(BRAND_ORDER), journal.date)
+    recompare(journal.date)
+    logging.info(f"🔁 {brand} {car_series} 재수집 완료: {len(previous)}행 → {len(rows)}행")
+    return {"brand": str(brand), "series": car_series, "rows": len(rows), "replaced": len(previous), "updated": True}
+
+def recompare(date):
+    # 엑셀을 저널에서 다시 쓰면 비교 단계가 덧붙인 웹 전용 행(Validated = X)이 빠지고 불일치 파일도 예전 결과로 남으므로,
+    # 그날 웹 결과가 있으면 비교를 다시 실행해 둘 다 새 앱 데이터 기준으로 만듦
+    if not os.path.exists(os.path.join("data", "etc", f"car_data_web_{date}.xlsx")):
+        logging.info(f"ℹ️ {date} 웹 데이터가 없어 비교 단계는 건너뜀")
+        return
+    data_compare = load_script("autoscrap-compare.py", "data_compare")
+    data_compare.main(date)
+
+def merge_shards(date=None, count=None, fresh=False):
+    # 샤드 파티션 저널을 일일 저널로 합친 뒤 일일 엑셀/히스토리 저장 (다른 VM의 파티션은 data/journal에 복사한 뒤 실행)
+    ensure_directories()
+    journal = RowJournal(date)
+    paths = journal.partition_paths()
+    if count:
+        paths = [path for path in paths if f"of{count}." in os.path.basename(path)]
+    if not paths:
+        logging.warning(f"⚠️ {journal.date} 병합할 샤드 파티션이 없습니다.")
+    if fresh:
+        # --fresh 샤드 실행이면 예전 일일 저널은 버리고 이번 파티션만 사용
+        journal.reset()
+    journal.merge_partitions(paths)
+    return save_to_excel(journal.rows(BRAND_ORDER), journal.date)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='GETCHA 앱 할인 데이터 수집')
+    parser.add_argument('--concurrency', type=int, default=1, help='동시에 수집할 브랜드 수 (1이면 순차 실행)')
+    parser.add_argument('--fresh', action='store_true', help='오늘 이미 수집된 시리즈도 무시하고 처음부터 다시 수집')
+    parser.add_argument('--resume', action='store_true', help='중단된 실행을 체크포인트의 첫 번째 미완료 브랜드/시리즈/모델부터 이어서 수집')
+    parser.add_argument('--detail-mode', choices=['click', 'pool', 'http'], default=SETTINGS['detail_mode'], help='모델 상세 가격 수집 방식')
+    parser.add_argument('--detail-pool', type=int, default=SETTINGS['detail_pool'], help='직접 이동 시 동시에 여는 상세 페이지 수')
+
+    parser.add_argument('--backend', choices=['dom', 'api'], default=SETTINGS['backend'], help='가격/시리즈 추출 방식 (api: JSON 응답 캡처 우선)')
+    parser.add_argument('--incremental', action='store_true', help='모델 목록이 직전 수집일과 같은 시리즈는 상세 수집 없이 직전 결과 사용')
+    parser.add_argument('--full-every', type=int, default=SETTINGS['full_every'], help='증분 모드에서 N일마다 변화가 없어도 다시 상세 수집 (0: 안 함)')
+    parser.add_argument('--record', type=str, help='HAR/HTML을 기록할 폴더 (오프라인 재생/벤치마크용)')
+    parser.add_argument('--replay', type=str, help='기록된 HAR로만 실행 (사이트 접속 없음)')
+    parser.add_argument('--retry-policy', type=str, help='브랜드별 재시도/대기 정책 JSON (예: {"01_BMW": {"max_retries": 7, "ready_timeout": 30000}})')
+    parser.add_argument('--request-policy', type=str, help='요청 허용 목록 JSON (기본값: src/request_policy.json)')
+    parser.add_argument('--parser', choices=BACKENDS, default=DEFAULT_BACKEND, help='HTML 파서 (lxml/selectolax는 설치된 경우에만 사용)')
+    parser.add_argument('--brands', type=parse_brands, help='수집할 브랜드 (쉼표 구분, 예: 01_BMW,Mini)')
+    parser.add_argument('--shard', type=Shard.parse, help='N개로 나눈 수집 중 k번째만 실행 (k/N, 결과는 파티션 저널에 기록)')
+    parser.add_argument('--spawn', type=int, help='N개 샤드 프로세스를 띄워 나눠 수집한 뒤 병합')
+    parser.add_argument('--merge', action='store_true', help='수집 없이 오늘 샤드 파티션만 병합해 일일 엑셀 생성')
+    parser.add_argument('--refresh', nargs=2, metavar=('BRAND', 'SERIES'), help='시리즈 하나만 다시 수집해 오늘 결과의 해당 행 교체 (예: --refresh 02_MB E-Class)')
+
+    args = parser.parse_args()
+    set_default_backend(args.parser)
+    recording.set_mode(record=args.record, replay=args.replay)
+    if args.retry_policy:
+        load_retry_policy(args.retry_policy)
+    SETTINGS['backend'] = args.backend
+    SETTINGS['detail_mode'] = args.detail_mode
+    SETTINGS['detail_pool'] = args.detail_pool
+    SETTINGS['incremental'] = args.incremental
+    SETTINGS['full_every'] = args.full_every
+    SETTINGS['request_policy'] = args.request_policy
+    SETTINGS['shard'] = args.shard
+
+    if args.spawn:
+        codes = spawn_shards(os.path.abspath(__file__), args.spawn, sys.argv[1:])
+        # 일부 샤드가 실패해도 기록된 시리즈까지는 병합 (실패한 샤드만 --shard로 다시 실행 후 --merge)
+        merge_shards(count=args.spawn, fresh=args.fresh)
+        sys.exit(1 if any(codes) else 0)
+    elif args.merge:
+        merge_shards()
+    elif args.refresh:
+        brand, car_series = args.refresh
+        asyncio.run(refresh_series(parse_brands(brand)[0], car_series))
+        METRICS.write_run_report("app_refresh")
+    else:
+        if args.shard:
+            tag_logs(args.shard)
+        asyncio.run(main(concurrency=args.concurrency, fresh=args.fresh, resume=args.resume, brands=args.brands))
+        METRICS.write_run_report(f"app_{args.shard.name}" if args.shard else "app")
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+import pandas as pd
+import recording
+from records import AppRecord, WebRecord, Fuel, records_to_frame, to_int
+from script_loader import load_script, SRC_DIR
+
+# 기록된 HAR/HTML(recording.py)을 고정 입력으로 사용해 단계별 소요 시간과 처리량을 측정
+#   parse: 저장된 HTML로 추출 함수만 반복 실행 (브라우저 없음)
+#   app/web: HAR 재생으로 실제 스크래퍼 실행 (사이트 접속 없음, chromium 필요)
+#   compare: 재생 결과(없으면 웹 스냅샷으로 만든 데이터)로 비교 실행
+BENCH_DIR = "data/bench"
+SUITES = ("parse", "app", "web", "compare")
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}  # stage -> [(seconds, rows)]
+
+    def add(self, stage, seconds, rows):
+        self.samples.setdefault(stage, []).append((seconds, rows))
+
+    def wrap(self, module, attr, rows=None):
+        # 모듈 함수를 시간 측정 래퍼로 교체 (같은 모듈 안에서 호출하는 곳도 모두 측정됨)
+        func = getattr(module, attr)
+        rows = rows or count_rows
+
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception:
+                self.add(attr, time.perf_counter() - started, 0)
+                raise
+            self.add(attr, time.perf_counter() - started, rows(result))
+            return result
+
+        setattr(module, attr, timed)
+        return func
+
+    def measure(self, stage, func, *args, rows=None):
+        started = time.perf_counter()
+        result = func(*args)
+        self.add(stage, time.perf_counter() - started, (rows or count_rows)(result))
+        return result
+
+    def report(self):
+        report = {}
+        for stage, samples in self.samples.items():
+            seconds = sorted(s for s, _ in samples)
+            total = sum(seconds)
+            rows = sum(r for _, r in samples)
+            report[stage] = {
+                "calls": len(seconds),
+                "total_s": round(total, 4),
+                "mean_ms": round(total / len(seconds) * 1000, 3),
+                "p50_ms": round(statistics.median(seconds) * 1000, 3),
+                "p95_ms": round(seconds[min(len(seconds) - 1, int(len(seconds) * 0.95))] * 1000, 3),
+                "rows": rows,
+                "rows_per_s": round(rows / total, 1) if total else None,
+            }
+        return report
+
+def count_rows(result):
+    if result is None:
+        return 0
+    if isinstance(result, (list, pd.DataFrame)):
+        return len(result)
+    return 1
+
+def count_price_row(result):
+    # get_car_price/parse_car_price는 행 하나(AppRecord)를 반환, 할인 없음([])이나 실패(None)는 0
+    return 1 if result else 0
+
+def read_html(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def bench_parse(timer, recording_dir, app, web, repeat):
+    cases = [
+        ("extract_series_names", "series", lambda c: app.extract_series_names(c), count_rows),
+        ("extract_model_records", "models", lambda c: app.extract_model_records(c), count_rows),
+        ("parse_car_price", "detail", lambda c: app.parse_car_price(c, "model", "series", "00", "P", "brand"), count_price_row),
+        ("extract_sections", "web", lambda c: web.extract_sections(c, "brand"), count_rows),
+    ]
+    for stage, kind, func, rows in cases:
+        paths = recording.html_snapshots(recording_dir, kind)
+        if not paths:
+            logging.warning(f"⚠️ {kind} HTML 스냅샷이 없어 {stage} 측정을 건너뜁니다.")
+            continue
+        contents = [read_html(path) for path in paths]
+        for _ in range(repeat):
+            for content in contents:
+                timer.measure(stage, func, content, rows=rows)
+
+async def bench_app(timer, app):
+    timer.wrap(app, "get_car_series")
+    timer.wrap(app, "get_car_info")
+    timer.wrap(app, "get_car_price", rows=count_price_row)
+    return await app.main(concurrency=1, fresh=True)
+
+async def bench_web(timer, web):
+    web.ensure_directories()
+    timer.wrap(web, "scrape_all_sections")
+    return await web.scrape_all_sections()
+
+def web_frame_from_snapshots(recording_dir, web):
+    rows = []
+    for path in recording.html_snapshots(recording_dir, "web"):
+        brand = os.path.basename(path)[len("web__"):-len(".html")]
+        rows.extend(web.extract_sections(read_html(path), brand))
+    return records_to_frame(rows, WebRecord)
+
+def bench_compare(timer, data_compare, app_df, web_df, repeat):
+    if web_df is None or web_df.empty:
+        logging.warning("⚠️ 비교할 웹 데이터가 없어 compare_data 측정을 건너뜁니다.")
+        return
+    if app_df is None or app_df.empty:
+        # 앱 재생 결과가 없으면 웹 데이터를 앱 형식으로 바꿔 같은 규모의 입력을 만듦
+        now = datetime.now()
+        app_df = records_to_frame([
+            AppRecord(now.year, now.month, now.day, r.Brand, r.MY, r.Series, Fuel.PETROL, r.Model, to_int(r.MSRP), to_int(r.Off) or 0, 0)
+            for r in web_df.itertuples(index=False)
+        ])
+
+    app_pre, web_pre = data_compare.preprocess_data(app_df.copy(), web_df.copy())
+    rows = len(app_pre) + len(web_pre)
+    for _ in range(repeat):
+        timer.measure("compare_data", data_compare.compare_data, app_pre, web_pre, "data/car_data_bench.xlsx", "bench", app_df, rows=lambda _: rows)
+
+def print_report(report, baseline=None):
+    print(f"{'stage':<24}{'calls':>7}{'total s':>10}{'mean ms':>11}{'p50 ms':>10}{'p95 ms':>10}{'rows':>8}{'rows/s':>11}{'vs base':>10}")
+    for stage, r in report.items():
+        diff = ""
+        if baseline and stage in baseline and baseline[stage]["mean_ms"]:
+            diff = f"{(r['mean_ms'] / baseline[stage]['mean_ms'] - 1) * 100:+.1f}%"
+        print(f"{stage:<24}{r['calls']:>7}{r['total_s']:>10}{r['mean_ms']:>11}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['rows']:>8}{str(r['rows_per_s']):>11}{diff:>10}")
+
+async def run_bench(recording_dir, suites, repeat=20):
+    recording_dir = os.path.abspath(recording_dir)
+    timer = StageTimer()
+
+    # 스크래퍼는 작업 폴더 기준 경로(src/urls.json, data/...)를 쓰므로 임시 폴더에서 실행해 실제 데이터를 건드리지 않음
+    workdir = tempfile.mkdtemp(prefix="autoscrap-bench-")
+    cwd = os.getcwd()
+    os.makedirs(os.path.join(workdir, "src"))
+    for filename in ("urls.json", "urls-web.json"):
+        shutil.copy(os.path.join(SRC_DIR, filename), os.path.join(workdir, "src", filename))
+    os.chdir(workdir)
+
+    try:
+        app = load_script("autoscrap.py", "autoscrap")
+        web = load_script("autoscrap-web.py", "autoscrap_web")
+        data_compare = load_script("autoscrap-compare.py", "data_compare")
+        recording.set_mode(replay=recording_dir)
+
+        if "parse" in suites:
+            bench_parse(timer, recording_dir, app, web, repeat)
+        app_df = await bench_app(timer, app) if "app" in suites else None
+        web_df = await bench_web(timer, web) if "web" in suites else None
+        if "compare" in suites:
+            if web_df is None:
+                web_df = web_frame_from_snapshots(recording_dir, web)
+            data_compare.ensure_directories()
+            bench_compare(timer, data_compare, app_df, web_df, repeat)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return timer.report()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='기록된 HAR/HTML로 스크래퍼 단계별 성능 측정')
+    parser.add_argument('recording', type=str, help='recording.py로 기록한 폴더')
+    parser.add_argument('--suites', type=str, default='parse,compare', help=f'측정할 항목 (쉼표 구분: {",".join(SUITES)})')
+    parser.add_argument('--repeat', type=int, default=20, help='parse/compare 반복 횟수')
+    parser.add_argument('--baseline', type=str, help='비교할 이전 결과 JSON')
+    parser.add_argument('-v', '--verbose', action='store_true', help='스크래퍼 로그 출력')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    suites = [suite.strip() for suite in args.suites.split(",") if suite.strip()]
+    unknown = [suite for suite in suites if suite not in SUITES]
+    if unknown:
+        parser.error(f"알 수 없는 항목: {', '.join(unknown)}")
+
+    report = asyncio.run(run_bench(args.recording, suites, args.repeat))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["stages"]
+    print_report(report, baseline)
+
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    output = os.path.join(BENCH_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"recording": os.path.abspath(args.recording), "suites": suites, "stages": report}, f, ensure_ascii=False, indent=2)
+    print(f"💾 {output}")
@@ -0,0 +1,313 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# 상시 실행 브라우저 서비스: Chromium 하나를 --remote-debugging-port로 띄워두고
+# 스크래퍼는 매번 launch 하지 않고 connect_over_cdp로 붙음 (Python Playwright에는 launch_server가 없음)
+#   제어 엔드포인트 (HTTP, 127.0.0.1)
+#     GET  /health   브라우저 프로세스/CDP 응답 여부, 세대, 열린 페이지 수, 임대 수
+#     POST /lease    브라우저 임대 → {"lease", "endpoint", "generation"}, 재시작 대기 중이면 끝날 때까지 기다림
+#     POST /release  임대 반납 (?lease=ID)
+#     POST /recycle  임대가 모두 반납되면 브라우저 재시작
+#   누적 페이지 수가 recycle_after를 넘으면 임대가 없을 때 브라우저를 다시 띄워 메모리 증가를 제한
+# 스크래퍼는 AUTOSCRAP_BROWSER_SERVICE=http://127.0.0.1:9230 이 설정되어 있을 때만 서비스 사용, 실패하면 직접 launch
+SERVICE_ENV = "AUTOSCRAP_BROWSER_SERVICE"
+DEFAULT_PORT = 9230
+DEFAULT_CDP_PORT = 9222
+DEFAULT_RECYCLE_AFTER = 300   # 이 브라우저 세대에서 열린 페이지 수
+LEASE_TTL = 3 * 60 * 60       # 반납하지 않고 죽은 클라이언트의 임대는 이 시간(초) 후 만료
+LEASE_WAIT = 120              # 재시작 대기 중 임대 요청이 기다리는 최대 시간(초)
+POLL_INTERVAL = 0.5           # 페이지 수를 세기 위해 /json/list를 조회하는 간격(초)
+
+CHROMIUM_ARGS = [
+    "--headless=new",
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--no-first-run",
+    "--no-default-browser-check",
+]
+
+def chromium_executable():
+    # Playwright가 설치한 Chromium 경로 (서비스 시작 시 한 번만 조회)
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        return p.chromium.executable_path
+
+def http_json(url, method="GET", timeout=5):
+    request = urllib.request.Request(url, method=method, data=b"" if method == "POST" else None)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+class BrowserService:
+    def __init__(self, executable=None, cdp_port=DEFAULT_CDP_PORT, recycle_after=DEFAULT_RECYCLE_AFTER):
+        self.executable = executable
+        self.cdp_port = cdp_port
+        self.cdp_url = f"http://127.0.0.1:{cdp_port}"
+        self.recycle_after = recycle_after
+        self.condition = threading.Condition()
+        self.process = None
+        self.profile_dir = None
+        self.generation = 0
+        self.pages = set()      # 이번 세대에서 본 페이지 target id
+        self.leases = {}        # lease id -> 만료 시각
+        self.recycle_pending = False
+        self.started_at = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        self.executable = self.executable or chromium_executable()
+        with self.condition:
+            self._launch()
+        threading.Thread(target=self._watch_pages, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        with self.condition:
+            self._terminate()
+
+    def _launch(self):
+        self.profile_dir = tempfile.mkdtemp(prefix="autoscrap-browser-")
+        self.process = subprocess.Popen(
+            [self.executable, *CHROMIUM_ARGS, f"--remote-debugging-port={self.cdp_port}", f"--user-data-dir={self.profile_dir}", "about:blank"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                http_json(f"{self.cdp_url}/json/version", timeout=1)
+                break
+            except Exception:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self._terminate()
+                    raise RuntimeError(f"브라우저가 CDP 포트 {self.cdp_port}에서 응답하지 않습니다.")
+                time.sleep(0.1)
+
+        self.generation += 1
+        self.pages = set()
+        self.recycle_pending = False
+        self.started_at = time.time()
+        logging.info(f"♨️ 브라우저 시작 (세대 {self.generation}, pid {self.process.pid}, CDP {self.cdp_url})")
+
+    def _terminate(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def _expire_leases(self):
+        now = time.time()
+        for lease_id, expires_at in list(self.leases.items()):
+            if expires_at < now:
+                logging.warning(f"⚠️ 반납되지 않은 임대 {lease_id} 만료")
+                del self.leases[lease_id]
+
+    def _maybe_recycle(self):
+        # condition 잠금 안에서 호출. 죽었거나 재시작 대기 중이고 사용 중인 임대가 없으면 다시 띄움
+        self._expire_leases()
+        if self.stopped.is_set() or self.leases:
+            return
+        if self.recycle_pending or not self.alive():
+            reason = "페이지 수 초과/요청" if self.alive() else "프로세스 종료"
+            logging.info(f"🔄 브라우저 재시작 ({reason}, 이번 세대 페이지 {len(self.pages)}개)")
+            self._terminate()
+            self._launch()
+            self.condition.notify_all()
+
+    def _watch_pages(self):
+        # 열린 페이지 target id를 모아 세대별 누적 페이지 수를 셈 (클라이언트가 따로 보고하지 않아도 됨)
+        while not self.stopped.wait(POLL_INTERVAL):
+            try:
+                targets = http_json(f"{self.cdp_url}/json/list", timeout=2)
+            except Exception:
+                targets = []
+            with self.condition:
+                self.pages.update(t["id"] for t in targets if t.get("type") == "page")
+                if self.recycle_after and len(self.pages) >= self.recycle_after and not self.recycle_pending:
+                    logging.info(f"♻️ 페이지 {len(self.pages)}개 사용, 임대가 모두 반납되면 재시작")
+                    self.recycle_pending = True
+                self._maybe_recycle()
+
+    def lease(self, wait=LEASE_WAIT):
+        with self.condition:
+            self._maybe_recycle()
+            # 재시작 대기 중에는 새 임대를 주지 않아 기존 임대가 빠지면 바로 재시작되도록 함
+            deadline = time.monotonic() + wait
+            while self.recycle_pending or not self.alive():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("브라우저 재시작 대기 시간 초과")
+                self.condition.wait(remaining)
+                self._maybe_recycle()
+            lease_id = uuid.uuid4().hex[:12]
+            self.leases[lease_id] = time.time() + LEASE_TTL
+            return {"lease": lease_id, "endpoint": self.cdp_url, "generation": self.generation}
+
+    def release(self, lease_id):
+        with self.condition:
+            released = self.leases.pop(lease_id, None) is not None
+            self._maybe_recycle()
+            self.condition.notify_all()
+            return released
+
+    def recycle(self):
+        with self.condition:
+            self.recycle_pending = True
+            self._maybe_recycle()
+            return {"recycle_pending": self.recycle_pending, "leases": len(self.leases)}
+
+    def health(self):
+        try:
+            http_json(f"{self.cdp_url}/json/version", timeout=2)
+            cdp_ok = True
+        except Exception:
+            cdp_ok = False
+        with self.condition:
+            return {
+                "status": "ok" if self.alive() and cdp_ok else "down",
+                "pid": self.process.pid if self.process else None,
+                "generation": self.generation,
+                "uptime_s": round(time.time() - self.started_at, 1) if self.started_at else None,
+                "pages": len(self.pages),
+                "recycle_after": self.recycle_after,
+                "recycle_pending": self.recycle_pending,
+                "leases": len(self.leases),
+                "endpoint": self.cdp_url,
+            }
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if urlsplit(self.path).path == "/health":
+                health = service.health()
+                self._send(200 if health["status"] == "ok" else 503, health)
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            try:
+                if url.path == "/lease":
+                    self._send(200, service.lease())
+                elif url.path == "/release":
+                    self._send(200, {"released": service.release(query.get("lease", [""])[0])})
+                elif url.path == "/recycle":
+                    self._send(200, service.recycle())
+                else:
+                    self._send(404, {"error": "not found"})
+            except Exception as e:
+                self._send(503, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            logging.debug(f"browser_service {self.address_string()} {format % args}")
+
+    return Handler
+
+def serve(service, port=DEFAULT_PORT):
+    # 브라우저를 띄우고 제어 서버를 돌려주는 함수 (serve_forever는 호출한 쪽에서)
+    service.start()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(service))
+    server.daemon_threads = True
+    logging.info(f"♨️ 브라우저 서비스 제어 엔드포인트: http://127.0.0.1:{port}")
+    return server
+
+def start_background(port=DEFAULT_PORT, **kwargs):
+    # Flask 등 다른 프로세스 안에서 데몬 스레드로 실행하고, 같은 프로세스의 스크래퍼가 쓰도록 환경 변수 설정
+    service = BrowserService(**kwargs)
+    server = serve(service, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ[SERVICE_ENV] = f"http://127.0.0.1:{port}"
+    return service, server
+
+def _release(service_url, lease_id):
+    try:
+        http_json(f"{service_url}/release?lease={lease_id}", method="POST")
+    except Exception as e:
+        logging.warning(f"⚠️ 브라우저 임대 반납 실패: {e}")
+
+async def launch(p, **launch_kwargs):
+    # 스크래퍼용: 서비스가 설정되어 있으면 임대 후 CDP로 연결, 아니면(또는 실패하면) 기존처럼 직접 launch
+    # 연결된 브라우저의 close()는 이 클라이언트가 만든 컨텍스트만 정리하고 연결을 끊음 → 끊기면 임대 반납
+    service_url = os.environ.get(SERVICE_ENV)
+    if service_url:
+        lease = None
+        try:
+            lease = await asyncio.to_thread(http_json, f"{service_url}/lease", "POST", LEASE_WAIT + 10)
+            started = time.perf_counter()
+            browser = await p.chromium.connect_over_cdp(lease["endpoint"])
+            browser.on("disconnected", lambda _: threading.Thread(target=_release, args=(service_url, lease["lease"])).start())
+            logging.info(f"♨️ 브라우저 서비스 연결 (세대 {lease['generation']}, {time.perf_counter() - started:.2f}초)")
+            return browser
+        except Exception as e:
+            if lease:
+                await asyncio.to_thread(_release, service_url, lease["lease"])
+            logging.warning(f"⚠️ 브라우저 서비스 사용 불가, 직접 실행합니다: {e}")
+    return await p.chromium.launch(**launch_kwargs)
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+    parser = argparse.ArgumentParser(description='상시 실행 브라우저 서비스 (스크래퍼는 AUTOSCRAP_BROWSER_SERVICE로 연결)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='제어 엔드포인트 포트')
+    parser.add_argument('--cdp-port', type=int, default=DEFAULT_CDP_PORT, help='Chromium 원격 디버깅 포트')
+    parser.add_argument('--recycle-after', type=int, default=DEFAULT_RECYCLE_AFTER, help='이 수만큼 페이지를 연 뒤 브라우저 재시작 (0: 안 함)')
+    parser.add_argument('--executable', type=str, help='Chromium 실행 파일 (기본값: Playwright 설치 경로)')
+    parser.add_argument('--health', action='store_true', help='실행 중인 서비스 상태만 출력')
+
+    args = parser.parse_args()
+    if args.health:
+        try:
+            print(json.dumps(http_json(f"http://127.0.0.1:{args.port}/health"), ensure_ascii=False, indent=2))
+        except Exception as e:
+            print(f"서비스에 연결할 수 없습니다: {e}")
+            sys.exit(1)
+        sys.exit(0)
+
+    service = BrowserService(args.executable, args.cdp_port, args.recycle_after)
+    server = serve(service, args.port)
+    print(f"스크래퍼에서 사용: set {SERVICE_ENV}=http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+from datetime import datetime
+import history_store
+from records import to_int
+
+# 오늘과 직전 수집일의 모델별 변화만 뽑아 작은 JSON으로 저장 (전체 엑셀을 눈으로 비교하지 않도록)
+CHANGES_DIR = "data/etc"
+
+KEY_COLUMNS = ("brand", "series", "my", "model")
+VALUE_COLUMNS = {
+    "app_prices": ("msrp", "cash_off", "finance_off"),
+    "web_prices": ("msrp", "off"),
+}
+SOURCES = {"app": "app_prices", "web": "web_prices"}
+
+def get_changes_path(date):
+    return os.path.join(CHANGES_DIR, f"changes_{date}.json")
+
+def index_snapshot(df, value_columns):
+    # (brand, series, my, model) -> 값 dict. 같은 키가 여러 번 나오면 첫 행만 사용
+    index = {}
+    duplicates = 0
+    for row in df.itertuples(index=False):
+        key = tuple(getattr(row, col) for col in KEY_COLUMNS)
+        if key in index:
+            duplicates += 1
+            continue
+        index[key] = {col: to_int(getattr(row, col)) for col in value_columns}
+    if duplicates:
+        logging.warning(f"⚠️ 중복 키 {duplicates}개는 첫 행만 비교합니다.")
+    return index
+
+def diff_snapshots(prev, cur, value_columns):
+    # 해시 인덱스끼리 조회만 하므로 행 수에 비례 (행 x 행 스캔 없음)
+    changes = []
+    for key, values in cur.items():
+        record = dict(zip(KEY_COLUMNS, key))
+        before = prev.get(key)
+        if before is None:
+            changes.append({"type": "new", **record, "after": values})
+            continue
+        for col in value_columns:
+            if before[col] != values[col]:
+                delta = values[col] - before[col] if before[col] is not None and values[col] is not None else None
+                changes.append({"type": col, **record, "before": before[col], "after": values[col], "delta": delta})
+
+    for key, values in prev.items():
+        if key not in cur:
+            changes.append({"type": "removed", **dict(zip(KEY_COLUMNS, key)), "before": values})
+    return changes
+
+def previous_date(date, table="app_prices"):
+    dates = [d for d in history_store.available_dates(table) if d < date]
+    return dates[-1] if dates else None
+
+def build_report(date=None):
+    date = date or datetime.now().strftime("%Y%m%d")
+    report = {"date": date, "prev_date": {}, "summary": {}, "changes": {}}
+
+    for source, table in SOURCES.items():
+        value_columns = VALUE_COLUMNS[table]
+        cur_df = history_store.load_snapshot(date, table)
+        prev_date = previous_date(date, table)
+        if cur_df.empty or prev_date is None:
+            logging.info(f"ℹ️ [{source}] {date} 또는 이전 수집일 데이터가 없어 변화 비교를 건너뜁니다.")
+            continue
+
+        prev_df = history_store.load_snapshot(prev_date, table)
+        changes = diff_snapshots(index_snapshot(prev_df, value_columns), index_snapshot(cur_df, value_columns), value_columns)
+
+        summary = {}
+        for change in changes:
+            summary[change["type"]] = summary.get(change["type"], 0) + 1
+
+        report["prev_date"][source] = prev_date
+        report["summary"][source] = summary
+        report["changes"][source] = changes
+        logging.info(f"🔔 [{source}] {prev_date} → {date} 변화 {len(changes)}건 {summary}")
+
+    return report
+
+def save_report(report):
+    os.makedirs(CHANGES_DIR, exist_ok=True)
+    path = get_changes_path(report["date"])
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    logging.info(f"💾 {path} 저장 완료.")
+    return path
+
+def load_report(date):
+    path = get_changes_path(date)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def main(date=None):
+    report = build_report(date)
+    save_report(report)
+    return report
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
+    parser = argparse.ArgumentParser(description='직전 수집일 대비 모델별 가격/할인 변화 추출')
+    parser.add_argument('--date', type=str, help='기준 날짜 (YYYYMMDD, 기본값: 오늘)')
+
+    args = parser.parse_args()
+    main(args.date)
@@ -0,0 +1,115 @@
+import logging
+import os
+import re
+import threading
+import history_store
+from records import to_int, to_text
+
+# Flask 페이지/다운로드용 data 디렉터리 색인
+# 요청마다 os.listdir + 정규식을 돌리지 않고, data/ 와 data/etc 의 mtime이 바뀌었거나(파일 추가/삭제)
+# 잡이 끝나 invalidate()가 불렸을 때만 다시 훑음. 날짜별 행(JSON)은 엑셀 대신 history_store에서 읽어 캐시
+ARTIFACTS = {
+    # 종류: (data 아래 하위 디렉터리, 파일명 패턴)
+    "app": ("", re.compile(r"car_data_(\d{8})\.xlsx$")),
+    "web": ("etc", re.compile(r"car_data_web_(\d{8})\.xlsx$")),
+    "discrepancies": ("etc", re.compile(r"discrepancies_(\d{8})\.xlsx$")),
+    "changes": ("etc", re.compile(r"changes_(\d{8})\.json$")),
+}
+ROW_TABLES = {"app": "app_prices", "web": "web_prices"}
+
+class DataIndex:
+    def __init__(self, data_dir="data", history_path=history_store.HISTORY_PATH):
+        self.data_dir = data_dir
+        self.history_path = history_path
+        self.lock = threading.Lock()
+        self.mtimes = None      # 마지막으로 훑었을 때의 디렉터리 mtime
+        self.by_date = {}       # date -> {종류: 파일명}
+        self.by_name = {}       # 파일명 -> 경로
+        self.rows_cache = {}    # (date, source) -> (history 버전, 행 목록)
+
+    def _dirs(self):
+        return [os.path.join(self.data_dir, sub) if sub else self.data_dir for sub in sorted({sub for sub, _ in ARTIFACTS.values()})]
+
+    def _dir_mtimes(self):
+        mtimes = []
+        for path in self._dirs():
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def invalidate(self):
+        # 파이프라인/재수집 잡 종료 시 (같은 파일을 덮어써서 디렉터리 mtime이 안 바뀐 경우 포함)
+        with self.lock:
+            self.mtimes = None
+            self.rows_cache.clear()
+
+    def _refresh(self):
+        # 스캔 전에 mtime을 먼저 읽어 두어, 스캔 도중 생긴 파일은 다음 요청에서 다시 잡힘
+        mtimes = self._dir_mtimes()
+        with self.lock:
+            if mtimes == self.mtimes:
+                return
+            by_date, by_name = {}, {}
+            for kind, (sub, pattern) in ARTIFACTS.items():
+                directory = os.path.join(self.data_dir, sub) if sub else self.data_dir
+                try:
+                    entries = list(os.scandir(directory))
+                except OSError:
+                    continue
+                for entry in entries:
+                    match = pattern.match(entry.name)
+                    if match and entry.is_file():
+                        by_date.setdefault(match.group(1), {})[kind] = entry.name
+                        by_name[entry.name] = entry.path
+            self.by_date, self.by_name, self.mtimes = by_date, by_name, mtimes
+            logging.info(f"🗂️ 데이터 색인 갱신: 날짜 {len(by_date)}개, 파일 {len(by_name)}개")
+
+    def dates(self, kind="app"):
+        # 해당 종류의 파일이 있는 날짜 (최신순)
+        self._refresh()
+        return sorted((date for date, kinds in self.by_date.items() if kind in kinds), reverse=True)
+
+    def artifacts(self, date):
+        self._refresh()
+        return dict(self.by_date.get(date, {}))
+
+    def path(self, filename):
+        # 색인에 있는 결과 파일만 경로를 돌려줌 (그 밖의 파일명은 None → 404)
+        self._refresh()
+        return self.by_name.get(filename)
+
+    def history_version(self):
+        # WAL 모드라 쓰기는 -wal 파일에 먼저 반영되므로 둘 다 봄
+        version = []
+        for path in (self.history_path, self.history_path + "-wal"):
+            try:
+                stat = os.stat(path)
+                version.append(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+            except OSError:
+                version.append("0")
+        return "-".join(version)
+
+    def rows(self, date, source="app"):
+        # 반환: (history 버전, 행 목록). 해당 날짜 스냅샷이 없으면 행 목록이 빈 리스트
+        version = self.history_version()
+        key = (date, source)
+        with self.lock:
+            cached = self.rows_cache.get(key)
+        if cached and cached[0] == version:
+            return cached
+
+        if not os.path.exists(self.history_path):
+            rows = []
+        else:
+            df = history_store.load_snapshot(date, ROW_TABLES[source], path=self.history_path)
+            # 정수 컬럼에 빈 값이 있으면 float NaN이 되므로 JSON에는 null/정수로
+            rows = [
+                {column: to_int(value) if column in history_store.MONEY_COLUMNS else to_text(value)
+                 for column, value in row.items() if column != "date"}
+                for row in df.to_dict("records")
+            ]
+        with self.lock:
+            self.rows_cache[key] = (version, rows)
+        return version, rows
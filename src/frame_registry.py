@@ -0,0 +1,69 @@
+import asyncio
+import weakref
+
+# 페이지의 iframe을 frameattached/framenavigated/framedetached 이벤트로 추적해 URL 패턴별로 보관
+# 모델마다 page.frames를 훑거나 frame_element()/get_attribute("src")로 CDP 왕복하지 않고 dict 조회로 찾음
+FRAME_PATTERNS = {
+    "brand": "https://cd.getcha.kr/brand/",
+    "detail": "car-detail",
+}
+
+_registries = weakref.WeakKeyDictionary()
+
+class FrameRegistry:
+    def __init__(self, page, patterns=FRAME_PATTERNS):
+        self.patterns = patterns
+        self.frames = {name: None for name in patterns}  # 패턴별 가장 최근에 해당 URL로 이동한 frame
+        self.changed = asyncio.Event()
+
+        page.on("frameattached", self._update)
+        page.on("framenavigated", self._update)
+        page.on("framedetached", self._detach)
+        for frame in page.frames:
+            self._update(frame)
+
+    def _update(self, frame):
+        for name, pattern in self.patterns.items():
+            if pattern in frame.url:
+                self.frames[name] = frame
+            elif self.frames[name] is frame:
+                # 같은 frame이 다른 URL로 이동하면 더 이상 해당 패턴이 아님
+                self.frames[name] = None
+        self.changed.set()
+
+    def _detach(self, frame):
+        for name, current in self.frames.items():
+            if current is frame:
+                self.frames[name] = None
+
+    def get(self, name):
+        frame = self.frames.get(name)
+        if frame is not None and frame.is_detached():
+            self.frames[name] = None
+            return None
+        return frame
+
+    async def wait_for(self, name, timeout=10000):
+        # 해당 패턴의 frame이 붙을 때까지 이벤트로 대기 (ms), 시간 안에 없으면 asyncio.TimeoutError
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout / 1000
+        while True:
+            frame = self.get(name)
+            if frame is not None:
+                return frame
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"{name} frame을 {timeout}ms 안에 찾지 못함")
+            self.changed.clear()
+            try:
+                await asyncio.wait_for(self.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+def frame_registry(page):
+    # 페이지마다 하나만 생성 (이벤트 등록은 처음 한 번)
+    registry = _registries.get(page)
+    if registry is None:
+        registry = FrameRegistry(page)
+        _registries[page] = registry
+    return registry
@@ -0,0 +1,273 @@
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+import pandas as pd
+from records import to_int, to_text, scraped_rows
+
+# 일별 수집 결과를 하나의 SQLite 파일에 누적 (날짜별 엑셀을 여러 개 열지 않고 추세/전년 비교 조회)
+# 금액은 엑셀의 "1,234" 같은 문자열 대신 만원 단위 INTEGER로 저장
+HISTORY_PATH = "data/history.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS app_prices (
+    date TEXT NOT NULL,
+    brand TEXT NOT NULL,
+    my TEXT,
+    series TEXT NOT NULL,
+    fuel TEXT,
+    model TEXT NOT NULL,
+    msrp INTEGER,
+    cash_off INTEGER,
+    finance_off INTEGER
+);
+CREATE INDEX IF NOT EXISTS app_prices_date ON app_prices (date);
+CREATE INDEX IF NOT EXISTS app_prices_key ON app_prices (brand, series, model, date);
+
+CREATE TABLE IF NOT EXISTS web_prices (
+    date TEXT NOT NULL,
+    brand TEXT NOT NULL,
+    my TEXT,
+    series TEXT NOT NULL,
+    model TEXT NOT NULL,
+    msrp INTEGER,
+    off INTEGER
+);
+CREATE INDEX IF NOT EXISTS web_prices_date ON web_prices (date);
+CREATE INDEX IF NOT EXISTS web_prices_key ON web_prices (brand, series, model, date);
+
+CREATE TABLE IF NOT EXISTS series_fingerprints (
+    date TEXT NOT NULL,
+    brand TEXT NOT NULL,
+    series TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    source_date TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    PRIMARY KEY (date, brand, series)
+);
+"""
+
+# 엑셀 컬럼 -> 테이블 컬럼
+APP_COLUMNS = {
+    "Brand": "brand", "MY": "my", "Series": "series", "Fuel Type": "fuel",
+    "Model (adjusted)": "model", "MSRP": "msrp", "Cash_off": "cash_off", "Finance_off": "finance_off",
+}
+WEB_COLUMNS = {
+    "Brand": "brand", "MY": "my", "Series": "series", "Model": "model", "MSRP": "msrp", "Off": "off",
+}
+MONEY_COLUMNS = ("msrp", "cash_off", "finance_off", "off")
+
+def connect(path=HISTORY_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def _records(df, columns, date):
+    records = []
+    for row in df.reindex(columns=list(columns)).itertuples(index=False):
+        record = {"date": date}
+        for excel_col, value in zip(columns, row):
+            col = columns[excel_col]
+            record[col] = to_int(value) if col in MONEY_COLUMNS else to_text(value)
+        if record["brand"] and record["series"] and record["model"]:
+            records.append(record)
+    return records
+
+def _replace_snapshot(table, columns, date, df, path):
+    # 같은 날짜를 다시 저장하면 그 날짜의 행을 통째로 교체 (재수집/백필 반복해도 중복 없음)
+    records = _records(df, columns, date)
+    cols = ["date"] + list(columns.values())
+    conn = connect(path)
+    try:
+        with conn:
+            conn.execute(f"DELETE FROM {table} WHERE date = ?", (date,))
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+                [tuple(record[col] for col in cols) for record in records],
+            )
+    finally:
+        conn.close()
+    logging.info(f"🗄️ {path} [{table}] {date}: {len(records)}행 저장")
+    return len(records)
+
+def save_app_snapshot(date, df, path=HISTORY_PATH):
+    return _replace_snapshot("app_prices", APP_COLUMNS, date, df, path)
+
+def save_web_snapshot(date, df, path=HISTORY_PATH):
+    return _replace_snapshot("web_prices", WEB_COLUMNS, date, df, path)
+
+def available_dates(table="app_prices", path=HISTORY_PATH):
+    conn = connect(path)
+    try:
+        return [row[0] for row in conn.execute(f"SELECT DISTINCT date FROM {table} ORDER BY date")]
+    finally:
+        conn.close()
+
+def load_snapshot(date, table="app_prices", path=HISTORY_PATH):
+    conn = connect(path)
+    try:
+        return pd.read_sql_query(f"SELECT * FROM {table} WHERE date = ?", conn, params=(date,))
+    finally:
+        conn.close()
+
+def discount_history(brand=None, series=None, model=None, start=None, end=None, path=HISTORY_PATH):
+    # 모델별 일자 추이 (인덱스 app_prices_key 사용)
+    where, params = [], []
+    for col, value in (("brand", brand), ("series", series), ("model", model)):
+        if value:
+            where.append(f"{col} = ?")
+            params.append(value)
+    if start:
+        where.append("date >= ?")
+        params.append(start)
+    if end:
+        where.append("date <= ?")
+        params.append(end)
+
+    query = "SELECT * FROM app_prices"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY brand, series, model, date"
+
+    conn = connect(path)
+    try:
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+def year_over_year(date=None, brand=None, path=HISTORY_PATH):
+    # date의 모델별 할인과, 1년 전 날짜 이전 가장 가까운 수집일의 할인을 (brand, series, model)로 조인
+    conn = connect(path)
+    try:
+        if date is None:
+            row = conn.execute("SELECT MAX(date) FROM app_prices").fetchone()
+            date = row[0]
+        if date is None:
+            return pd.DataFrame()
+
+        year_ago = (datetime.strptime(date, "%Y%m%d") - timedelta(days=365)).strftime("%Y%m%d")
+        row = conn.execute("SELECT MAX(date) FROM app_prices WHERE date <= ?", (year_ago,)).fetchone()
+        prev_date = row[0]
+        if prev_date is None:
+            logging.warning(f"⚠️ {year_ago} 이전 수집 데이터가 없어 전년 비교를 할 수 없습니다.")
+            return pd.DataFrame()
+
+        query = """
+            SELECT cur.brand, cur.series, cur.model, cur.my,
+                   ? AS prev_date, prev.msrp AS prev_msrp, prev.cash_off AS prev_cash_off, prev.finance_off AS prev_finance_off,
+                   ? AS date, cur.msrp, cur.cash_off, cur.finance_off,
+                   cur.cash_off - prev.cash_off AS cash_off_delta,
+                   cur.finance_off - prev.finance_off AS finance_off_delta
+            FROM app_prices cur
+            LEFT JOIN app_prices prev
+              ON prev.date = ? AND prev.brand = cur.brand AND prev.series = cur.series AND prev.model = cur.model
+            WHERE cur.date = ?
+        """
+        params = [prev_date, date, prev_date, date]
+        if brand:
+            query += " AND cur.brand = ?"
+            params.append(brand)
+        query += " ORDER BY cur.brand, cur.series, cur.model"
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+def save_fingerprints(date, entries, path=HISTORY_PATH):
+    # 증분 수집용 시리즈 지문과 그 시리즈의 엑셀 행 (다음 날 지문이 같으면 그대로 이어 씀)
+    # entries: [(brand, series, fingerprint, source_date, rows)] → 실행마다 한 번에 기록
+    conn = connect(path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO series_fingerprints (date, brand, series, fingerprint, source_date, rows) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (date, brand, series, fingerprint, source_date, json.dumps(rows, ensure_ascii=False))
+                    for brand, series, fingerprint, source_date, rows in entries
+                ],
+            )
+    finally:
+        conn.close()
+
+def previous_fingerprint_date(date, path=HISTORY_PATH):
+    conn = connect(path)
+    try:
+        return conn.execute("SELECT MAX(date) FROM series_fingerprints WHERE date < ?", (date,)).fetchone()[0]
+    finally:
+        conn.close()
+
+def load_fingerprints(date, path=HISTORY_PATH):
+    conn = connect(path)
+    try:
+        return {
+            (brand, series): {"fingerprint": fingerprint, "source_date": source_date, "rows": json.loads(rows)}
+            for brand, series, fingerprint, source_date, rows in conn.execute(
+                "SELECT brand, series, fingerprint, source_date, rows FROM series_fingerprints WHERE date = ?", (date,)
+            )
+        }
+    finally:
+        conn.close()
+
+def backfill(data_dir="data", path=HISTORY_PATH):
+    # 기존 엑셀 파일을 한 번 읽어 저장소로 옮김 (날짜 단위 교체이므로 여러 번 실행해도 안전)
+    def save_app(date, df, path):
+        # 실시간 저장(save_to_excel)과 같도록 비교 단계가 앱 엑셀에 덧붙인 행은 빼고 가져옴
+        save_app_snapshot(date, scraped_rows(df), path)
+
+    sources = [
+        (os.path.join(data_dir, "car_data_*.xlsx"), r"car_data_(\d{8})\.xlsx$", save_app),
+        (os.path.join(data_dir, "etc", "car_data_web_*.xlsx"), r"car_data_web_(\d{8})\.xlsx$", save_web_snapshot),
+    ]
+    count = 0
+    for pattern, date_pattern, save in sources:
+        for file_path in sorted(glob.glob(pattern)):
+            match = re.search(date_pattern, os.path.basename(file_path))
+            if not match:
+                continue
+            try:
+                df = pd.read_excel(file_path, dtype=str)
+                save(match.group(1), df, path)
+                count += 1
+            except Exception as e:
+                logging.error(f"❌ {file_path} 백필 실패: {e}")
+
+    logging.info(f"🗄️ 백필 완료: 파일 {count}개")
+    return count
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
+    parser = argparse.ArgumentParser(description='일별 할인 데이터 히스토리 저장소 (SQLite)')
+    parser.add_argument('--db', type=str, default=HISTORY_PATH, help='저장소 파일 경로')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    backfill_parser = sub.add_parser('backfill', help='기존 엑셀 파일을 저장소로 가져오기')
+    backfill_parser.add_argument('--data-dir', type=str, default='data', help='엑셀 파일이 있는 폴더')
+
+    yoy_parser = sub.add_parser('yoy', help='전년 대비 할인 비교')
+    yoy_parser.add_argument('--date', type=str, help='기준 날짜 (YYYYMMDD, 기본값: 최근 수집일)')
+    yoy_parser.add_argument('--brand', type=str, help='브랜드 (예: 02_MB)')
+    yoy_parser.add_argument('--output', type=str, help='결과를 저장할 엑셀 경로')
+
+    args = parser.parse_args()
+
+    if args.command == 'backfill':
+        backfill(args.data_dir, args.db)
+    elif args.command == 'yoy':
+        result = year_over_year(args.date, args.brand, args.db)
+        if args.output:
+            result.to_excel(args.output, index=False)
+            logging.info(f"💾 {args.output} 저장 완료. 총 {len(result)}행.")
+        else:
+            print(result.to_string(index=False))
@@ -0,0 +1,283 @@
+import logging
+import os
+from functools import lru_cache
+from bs4 import BeautifulSoup
+
+# 추출 함수들이 사용하는 HTML 파서 선택
+#   html.parser: BeautifulSoup 기본 (순수 파이썬, 기본값)
+#   lxml: lxml.html + cssselect
+#   selectolax: selectolax(lexbor)
+BACKENDS = ("html.parser", "lxml", "selectolax")
+DEFAULT_BACKEND = os.environ.get("AUTOSCRAP_PARSER", "html.parser")
+
+# 파서 비교용 고정 입력 (사이트 구조만 남긴 HTML, recording.snapshot과 같은 파일명)과 기대 추출 결과
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIXTURE_HTML_DIR = os.path.join(FIXTURE_DIR, "html")
+FIXTURE_EXPECTED_PATH = os.path.join(FIXTURE_DIR, "expected.json")
+
+# BeautifulSoup의 get_text/stripped_strings는 이 태그 안의 문자열(Script/Stylesheet/TemplateString)을 건너뜀
+SKIP_TEXT_TAGS = ("script", "style", "template")
+
+def class_matches(classes, class_):
+    # BeautifulSoup의 class_ 검색과 동일: 공백이 있으면 class 속성 전체 문자열, 없으면 개별 클래스 비교
+    if " " in class_:
+        return " ".join(classes) == class_
+    return class_ in classes
+
+class SoupNode:
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, css):
+        return [SoupNode(n) for n in self.node.select(css)]
+
+    def select_one(self, css):
+        n = self.node.select_one(css)
+        return SoupNode(n) if n is not None else None
+
+    def text(self):
+        return self.node.get_text(strip=True)
+
+    def strings(self):
+        return list(self.node.stripped_strings)
+
+    def get(self, name, default=None):
+        value = self.node.get(name, default)
+        return " ".join(value) if isinstance(value, list) else value
+
+    @property
+    def classes(self):
+        return self.node.get("class", [])
+
+    def find_parent(self, tag, class_):
+        n = self.node.find_parent(tag, class_=class_)
+        return SoupNode(n) if n is not None else None
+
+@lru_cache(maxsize=256)
+def lxml_selector(css):
+    from lxml.cssselect import CSSSelector
+    return CSSSelector(css, translator="html")
+
+def lxml_text_nodes(node):
+    skip = " or ".join(f"ancestor::{tag}" for tag in SKIP_TEXT_TAGS)
+    return node.xpath(f".//text()[not({skip})]")
+
+class LxmlNode:
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, css):
+        # CSSSelector는 자기 자신도 포함하므로 BeautifulSoup과 맞추기 위해 제외
+        return [LxmlNode(n) for n in lxml_selector(css)(self.node) if n is not self.node]
+
+    def select_one(self, css):
+        for n in lxml_selector(css)(self.node):
+            if n is not self.node:
+                return LxmlNode(n)
+        return None
+
+    def text(self):
+        return "".join(self.strings())
+
+    def strings(self):
+        # itertext()는 <script>/<style>/<template> 내용도 포함하므로 텍스트 노드만 골라 BeautifulSoup과 맞춤
+        return [s.strip() for s in lxml_text_nodes(self.node) if s.strip()]
+
+    def get(self, name, default=None):
+        return self.node.get(name, default)
+
+    @property
+    def classes(self):
+        return (self.node.get("class") or "").split()
+
+    def find_parent(self, tag, class_):
+        for n in self.node.iterancestors(tag):
+            if class_matches((n.get("class") or "").split(), class_):
+                return LxmlNode(n)
+        return None
+
+class LexborNode:
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, css):
+        # node.css()는 자기 자신도 포함하므로 BeautifulSoup과 맞추기 위해 제외
+        return [LexborNode(n) for n in self.node.css(css) if n != self.node]
+
+    def select_one(self, css):
+        for n in self.node.css(css):
+            if n != self.node:
+                return LexborNode(n)
+        return None
+
+    def text(self):
+        return "".join(self.strings())
+
+    def strings(self):
+        # text(deep=True)는 <script>/<style> 내용도 포함하므로 텍스트 노드를 직접 골라 BeautifulSoup과 맞춤
+        return [
+            n.text_content.strip()
+            for n in self.node.traverse(include_text=True)
+            if n.tag == "-text" and n.parent is not None and n.parent.tag not in SKIP_TEXT_TAGS
+            and n.text_content and n.text_content.strip()
+        ]
+
+    def get(self, name, default=None):
+        value = self.node.attributes.get(name, default)
+        return default if value is None else value
+
+    @property
+    def classes(self):
+        return (self.node.attributes.get("class") or "").split()
+
+    def find_parent(self, tag, class_):
+        n = self.node.parent
+        while n is not None:
+            if n.tag == tag and class_matches((n.attributes.get("class") or "").split(), class_):
+                return LexborNode(n)
+            n = n.parent
+        return None
+
+def available_backends():
+    backends = ["html.parser"]
+    try:
+        import lxml.html  # noqa: F401
+        import cssselect  # noqa: F401
+        backends.append("lxml")
+    except ImportError:
+        pass
+    try:
+        import selectolax.lexbor  # noqa: F401
+        backends.append("selectolax")
+    except ImportError:
+        pass
+    return backends
+
+def set_default_backend(backend):
+    global DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"지원하지 않는 파서: {backend} ({', '.join(BACKENDS)})")
+    if backend not in available_backends():
+        logging.warning(f"⚠️ {backend} 파서가 설치되어 있지 않아 html.parser를 사용합니다.")
+        backend = "html.parser"
+    DEFAULT_BACKEND = backend
+
+def parse_html(content, backend=None):
+    backend = backend or DEFAULT_BACKEND
+    if backend == "lxml":
+        import lxml.html
+        return LxmlNode(lxml.html.document_fromstring(content or "<html></html>"))
+    if backend == "selectolax":
+        from selectolax.lexbor import LexborHTMLParser
+        return LexborNode(LexborHTMLParser(content or "<html></html>").root)
+    return SoupNode(BeautifulSoup(content, "html.parser"))
+
+def extract_all(app, web, content):
+    # 저장된 HTML 하나에 대해 모든 추출 함수를 실행 (해당 페이지가 아니면 빈 결과)
+    return {
+        "series": app.extract_series_names(content),
+        "models": app.extract_model_records(content),
+        "price": app.parse_car_price(content, "model", "series", "00", "P", "brand"),
+        "sections": web.extract_sections(content, "brand"),
+    }
+
+def count_results(value):
+    # parse_car_price는 행 하나(AppRecord)를 반환하고, 할인 없음([])/실패(None)는 0
+    if isinstance(value, list):
+        return len(value)
+    return 1 if value else 0
+
+def to_json(value):
+    # 추출 결과를 기대 결과 파일과 비교할 수 있는 JSON 값으로 (AppRecord의 연/월/일은 실행 날짜라 제외)
+    from records import AppRecord
+    if isinstance(value, list):
+        return [to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, AppRecord):
+        return value.to_row()[3:]
+    if hasattr(value, "to_row"):
+        return value.to_row()
+    if isinstance(value, str):
+        return str(value)  # Brand/Fuel enum → 값
+    return value
+
+def check_equivalence(paths, expected_path=None, update=False):
+    # 설치된 모든 파서로 같은 HTML을 추출해 html.parser 결과와 완전히 같은지 확인
+    # expected_path가 있으면 html.parser 결과도 기대 결과 파일과 같은지 확인 (update=True면 현재 결과로 갱신)
+    # 스크립트로 실행되면 이 파일은 __main__이므로, 추출 함수들이 실제로 쓰는 html_parser 모듈의 설정을 바꿔야 함
+    import json
+    import html_parser
+    from script_loader import load_script
+    app = load_script("autoscrap.py", "autoscrap")
+    web = load_script("autoscrap-web.py", "autoscrap_web")
+    logging.getLogger().setLevel(logging.WARNING)
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                files.extend(os.path.join(dirpath, f) for f in sorted(filenames) if f.endswith(".html"))
+        else:
+            files.append(path)
+
+    golden = {}
+    if expected_path and not update:
+        with open(expected_path, encoding="utf-8") as f:
+            golden = json.load(f)
+
+    backends = available_backends()
+    mismatches = 0
+    results = {}
+    for file_path in files:
+        with open(file_path, encoding="utf-8") as f:
+            content = f.read()
+
+        html_parser.set_default_backend("html.parser")
+        expected = extract_all(app, web, content)
+        name = os.path.basename(file_path)
+        results[name] = to_json(expected)
+        if expected_path and not update and golden.get(name) != results[name]:
+            mismatches += 1
+            print(f"❌ {file_path} 기대 결과와 불일치\n  기대: {golden.get(name)}\n  html.parser: {results[name]}")
+
+        for backend in backends[1:]:
+            html_parser.set_default_backend(backend)
+            actual = extract_all(app, web, content)
+            for key in expected:
+                if actual[key] != expected[key]:
+                    mismatches += 1
+                    print(f"❌ {file_path} [{backend}] {key} 불일치\n  html.parser: {expected[key]}\n  {backend}: {actual[key]}")
+
+        counts = ", ".join(f"{key} {count_results(value)}" for key, value in expected.items())
+        print(f"{'✅' if not mismatches else '⚠️'} {file_path}: {counts}")
+
+    if expected_path and update:
+        with open(expected_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"📝 기대 결과 갱신: {expected_path} ({len(results)}개 파일)")
+    elif expected_path:
+        # 기대 결과에는 있는데 고정 입력 파일이 없어진 경우
+        for name in sorted(set(golden) - set(results)):
+            mismatches += 1
+            print(f"❌ {name} 고정 입력 파일 없음")
+
+    print(f"파일 {len(files)}개, 파서 {', '.join(backends)} 비교 완료, 불일치 {mismatches}건")
+    return mismatches == 0
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='HTML 파서 백엔드 결과 비교 (저장된 HTML 기준)')
+    parser.add_argument('paths', nargs='*', help='HTML 파일 또는 디렉터리 (생략하면 src/fixtures의 고정 입력을 기대 결과와 함께 확인)')
+    parser.add_argument('--update', action='store_true', help='src/fixtures/expected.json을 현재 html.parser 결과로 갱신 (추출 로직을 의도적으로 바꾼 경우)')
+
+    args = parser.parse_args()
+
+    if args.paths:
+        ok = check_equivalence(args.paths)
+    else:
+        ok = check_equivalence([FIXTURE_HTML_DIR], FIXTURE_EXPECTED_PATH, update=args.update)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+
+JOB_DIR = "data/jobs"
+LOG_LIMIT = 5000       # 잡마다 메모리에 보관하는 로그 줄 수 (ring buffer)
+PERSIST_EVERY = 50     # 로그 N줄마다 파일에 저장
+
+class Job:
+    def __init__(self, kind, key, params=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.key = key
+        self.params = params or {}
+        self.status = "queued"
+        self.created_at = datetime.now().isoformat(timespec="seconds")
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.logs = deque(maxlen=LOG_LIMIT)  # (seq, line)
+        self.next_seq = 0
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def lines_since(self, since=0):
+        return [{"seq": seq, "line": line} for seq, line in self.logs if seq >= since]
+
+    def to_dict(self, since=None):
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+            "next": self.next_seq,
+        }
+        if since is not None:
+            data["lines"] = self.lines_since(since)
+        return data
+
+class JobLogHandler(logging.Handler):
+    # 워커 스레드에서 나온 로그만 현재 실행 중인 잡에 기록
+    def __init__(self, manager):
+        super().__init__()
+        self.manager = manager
+        self.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s'))
+
+    def emit(self, record):
+        if record.thread != self.manager.worker_ident:
+            return
+        job = self.manager.current
+        if job is not None:
+            self.manager.append_log(job, self.format(record))
+
+class JobManager:
+    # 단일 워커 스레드로 잡을 하나씩 실행. 같은 key의 잡이 대기/실행 중이면 새로 만들지 않고 그 잡을 돌려줌
+    def __init__(self, job_dir=JOB_DIR):
+        self.job_dir = job_dir
+        os.makedirs(job_dir, exist_ok=True)
+        self.jobs = {}
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.current = None
+        self.listeners = []
+
+        self.worker = threading.Thread(target=self._run_worker, name="job-worker", daemon=True)
+        self.worker.start()
+        self.worker_ident = self.worker.ident
+
+        logging.getLogger().addHandler(JobLogHandler(self))
+
+    def submit(self, kind, runner, key=None, params=None):
+        # 반환값: (job, created) - created가 False면 이미 진행 중인 잡에 연결된 것
+        key = key or kind
+        with self.lock:
+            for job in self.jobs.values():
+                if job.key == key and job.active:
+                    return job, False
+
+            job = Job(kind, key, params)
+            self.jobs[job.id] = job
+            self.queue.put((job, runner))
+        self._persist(job)
+        return job, True
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is not None:
+            return job
+        return self._load(job_id)
+
+    def list(self, limit=20):
+        with self.lock:
+            jobs = sorted(self.jobs.values(), key=lambda j: j.created_at, reverse=True)
+        return jobs[:limit]
+
+    def snapshot(self, job, since=None):
+        # 워커 스레드가 로그를 추가하는 중에 deque를 순회하지 않도록 잠금 안에서 dict로 복사
+        with self.lock:
+            return job.to_dict(since=since)
+
+    def add_listener(self, callback):
+        # 잡 종료 시 호출 (예: 캐시 무효화)
+        self.listeners.append(callback)
+
+    def append_log(self, job, line):
+        with self.changed:
+            job.logs.append((job.next_seq, line))
+            job.next_seq += 1
+            persist = job.next_seq % PERSIST_EVERY == 0
+            self.changed.notify_all()
+        if persist:
+            self._persist(job)
+
+    def wait(self, job, since, timeout=25):
+        # long-poll / SSE용: since 이후 새 로그가 생기거나 잡이 끝날 때까지 대기
+        with self.changed:
+            self.changed.wait_for(lambda: job.next_seq > since or not job.active, timeout=timeout)
+            return job.lines_since(since), job.active
+
+    def _run_worker(self):
+        while True:
+            job, runner = self.queue.get()
+            with self.changed:
+                self.current = job
+                job.status = "running"
+                job.started_at = datetime.now().isoformat(timespec="seconds")
+                self.changed.notify_all()
+            self._persist(job)
+
+            try:
+                job.result = runner()
+                ok = not isinstance(job.result, dict) or all(v == "ok" for v in job.result.values())
+                status = "done" if ok else "failed"
+            except Exception as e:
+                logging.error(f"❌ 잡 {job.id} 실행 중 오류 발생: {e}")
+                job.error = str(e)
+                status = "failed"
+
+            with self.changed:
+                job.status = status
+                job.finished_at = datetime.now().isoformat(timespec="seconds")
+                self.current = None
+                self.changed.notify_all()
+            self._persist(job)
+
+            for callback in self.listeners:
+                try:
+                    callback(job)
+                except Exception as e:
+                    logging.error(f"❌ 잡 종료 콜백 오류: {e}")
+
+    def _path(self, job_id):
+        return os.path.join(self.job_dir, f"{job_id}.json")
+
+    def _persist(self, job):
+        with self.lock:
+            data = job.to_dict(since=0)
+        tmp_path = self._path(job.id) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, self._path(job.id))
+
+    def _load(self, job_id):
+        # 서버 재시작 전에 끝난 잡은 파일에서 복원 (읽기 전용)
+        if not job_id.isalnum() or not os.path.exists(self._path(job_id)):
+            return None
+        with open(self._path(job_id), encoding="utf-8") as f:
+            data = json.load(f)
+
+        job = Job(data["kind"], data["kind"], data.get("params"))
+        job.id = data["id"]
+        job.created_at = data["created_at"]
+        job.started_at = data["started_at"]
+        job.finished_at = data["finished_at"]
+        job.result = data["result"]
+        job.error = data["error"]
+        # 실행 도중 서버가 내려간 잡은 더 이상 진행되지 않음
+        job.status = data["status"] if data["status"] not in ("queued", "running") else "interrupted"
+        for entry in data.get("lines", []):
+            job.logs.append((entry["seq"], entry["line"]))
+        job.next_seq = data.get("next", len(job.logs))
+        return job
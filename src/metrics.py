@@ -0,0 +1,171 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# 단계별 소요 시간/횟수 기록
+#   timer: goto, wait_for_series/wait_for_sections/wait_for_models/wait_for_price(요소 대기), go_back, iframe 찾기,
+#          재시도 sleep(backoff), HTML 파싱, 엑셀 저장 등 (이름 + 브랜드 정도의 적은 라벨로 집계)
+#   count: 재시도, 타임아웃 등 횟수
+#   unit: 브랜드/시리즈/모델 단위 소요 시간 (실행 리포트 JSONL에 한 줄씩)
+# 실행이 끝나면 data/metrics/run_*.jsonl 로 저장하고, 누적값은 Flask /metrics 에서 Prometheus 형식으로 제공
+METRICS_DIR = "data/metrics"
+PROMETHEUS_PREFIX = "autoscrap"
+
+def _key(name, labels):
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None)))
+
+class Registry:
+    def __init__(self):
+        self.timers = {}    # (name, labels) -> [count, total, max]
+        self.counters = {}  # (name, labels) -> value
+        self.units = []     # 브랜드/시리즈/모델 단위 기록
+
+    def observe(self, name, seconds, labels):
+        stat = self.timers.setdefault(_key(name, labels), [0, 0.0, 0.0])
+        stat[0] += 1
+        stat[1] += seconds
+        stat[2] = max(stat[2], seconds)
+
+    def count(self, name, value, labels):
+        key = _key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def merge(self, other):
+        for key, (count, total, max_) in other.timers.items():
+            stat = self.timers.setdefault(key, [0, 0.0, 0.0])
+            stat[0] += count
+            stat[1] += total
+            stat[2] = max(stat[2], max_)
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.run = Registry()
+        self.total = Registry()  # 이전 실행들의 누적 (Prometheus용)
+        self.started_at = datetime.now()
+
+    def begin_run(self):
+        with self.lock:
+            self.total.merge(self.run)
+            self.run = Registry()
+            self.started_at = datetime.now()
+
+    def observe(self, name, seconds, **labels):
+        with self.lock:
+            self.run.observe(name, seconds, labels)
+
+    def count(self, name, value=1, **labels):
+        with self.lock:
+            self.run.count(name, value, labels)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        # async 코드에서도 with 블록 안에서 await 하면 됨. 타임아웃 예외는 timeouts 횟수로도 집계
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            if "Timeout" in type(e).__name__:
+                self.count("timeouts", step=name, **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    async def track(self, name, awaitable, **labels):
+        # 한 줄짜리 await 측정용: await METRICS.track("goto", page.goto(url), brand=brand)
+        with self.timer(name, **labels):
+            return await awaitable
+
+    def measure(self, name, **labels):
+        # 동기 함수용 데코레이터 (예: HTML 추출 함수)
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def unit(self, kind, brand, series=None, model=None):
+        # 브랜드/시리즈/모델 하나를 처리한 시간과 결과. 블록 안에서 record["rows"], record["status"]를 채울 수 있음
+        record = {"kind": kind, "brand": brand, "series": series, "model": model, "status": "ok"}
+        started = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = str(e)
+            raise
+        finally:
+            record["seconds"] = round(time.perf_counter() - started, 4)
+            self.observe(kind, record["seconds"], brand=brand)
+            with self.lock:
+                self.run.units.append(record)
+
+    def write_run_report(self, name="run", metrics_dir=METRICS_DIR):
+        # 이번 실행의 요약/단위 기록/집계를 JSONL 한 파일로 저장
+        os.makedirs(metrics_dir, exist_ok=True)
+        finished_at = datetime.now()
+        path = os.path.join(metrics_dir, f"{name}_{finished_at.strftime('%Y%m%d_%H%M%S')}.jsonl")
+
+        with self.lock:
+            lines = [{
+                "type": "run",
+                "name": name,
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "finished_at": finished_at.isoformat(timespec="seconds"),
+                "seconds": round((finished_at - self.started_at).total_seconds(), 3),
+            }]
+            lines.extend({"type": "unit", **record} for record in self.run.units)
+            for (metric, labels), (count, total, max_) in sorted(self.run.timers.items()):
+                lines.append({
+                    "type": "timer", "name": metric, "labels": dict(labels),
+                    "count": count, "total_s": round(total, 4), "mean_s": round(total / count, 4), "max_s": round(max_, 4),
+                })
+            for (metric, labels), value in sorted(self.run.counters.items()):
+                lines.append({"type": "counter", "name": metric, "labels": dict(labels), "value": value})
+
+        with open(path, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        logging.info(f"📈 실행 리포트 저장: {path}")
+        return path
+
+    def prometheus_text(self):
+        with self.lock:
+            registry = Registry()
+            registry.merge(self.total)
+            registry.merge(self.run)
+
+        def fmt_labels(labels):
+            escaped = (
+                k + '="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+                for k, v in labels
+            )
+            return "{" + ",".join(escaped) + "}"
+
+        lines = [
+            f"# HELP {PROMETHEUS_PREFIX}_step_seconds Time spent per scraping step",
+            f"# TYPE {PROMETHEUS_PREFIX}_step_seconds summary",
+        ]
+        for (metric, labels), (count, total, _) in sorted(registry.timers.items()):
+            labels = (("step", metric),) + labels
+            lines.append(f"{PROMETHEUS_PREFIX}_step_seconds_count{fmt_labels(labels)} {count}")
+            lines.append(f"{PROMETHEUS_PREFIX}_step_seconds_sum{fmt_labels(labels)} {total:.6f}")
+
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}_events_total Retries, timeouts and other counted events")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_events_total counter")
+        for (metric, labels), value in sorted(registry.counters.items()):
+            labels = (("event", metric),) + labels
+            lines.append(f"{PROMETHEUS_PREFIX}_events_total{fmt_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+METRICS = Metrics()
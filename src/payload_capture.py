@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import re
+import logging
+from datetime import datetime
+from records import to_int
+
+# GETCHA API 응답(JSON)에서 값을 찾을 때 사용하는 키 후보 (응답 스키마가 바뀌면 여기만 수정)
+SERIES_NAME_KEYS = ("seriesName", "modelGroupName", "lineupName")
+MODEL_NAME_KEYS = ("trimName", "modelName", "carName", "name", "title")
+MSRP_KEYS = ("msrp", "carPrice", "basePrice", "retailPrice", "price")
+CASH_OFF_KEYS = ("cashDiscount", "cashDiscountPrice", "discountPrice", "discount")
+FINANCE_OFF_KEYS = ("financeDiscount", "financeDiscountPrice", "installmentDiscount", "loanDiscount")
+
+# 출고가가 이 값 이상이면 그 객체의 금액은 원 단위 (만원 단위라면 100억)
+WON_THRESHOLD = 1_000_000
+
+CAPTURE_HOSTS = ("getcha.kr",)
+CAPTURE_DIR = "data/capture"
+
+def normalize_name(text):
+    return re.sub(r"\s+", " ", str(text)).strip()
+
+def is_won(value):
+    # "6,520만원" 같은 문자열은 만원 단위, 숫자는 크기로 판단
+    if isinstance(value, str):
+        return "만원" not in value and (to_int(value) or 0) >= WON_THRESHOLD
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value >= WON_THRESHOLD
+
+def to_manwon(value, won=False):
+    # 만원 단위 정수로 통일. won=True면 숫자 값을 원 → 만원으로 변환 ("만원"이 붙은 문자열은 그대로)
+    # 할인액만 보고는 단위를 알 수 없으므로 (5만원 = 50000원) 단위는 같은 객체의 출고가로 정함
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        amount = to_int(value)
+        if amount is None or "만원" in value:
+            return amount
+        value = amount
+    if not isinstance(value, (int, float)):
+        return None
+    return int(value) // 10000 if won else int(value)
+
+def first_value(obj, keys):
+    for key in keys:
+        if key in obj and obj[key] not in (None, ""):
+            return obj[key]
+    return None
+
+def walk_dicts(payload):
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            yield node
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+
+class PayloadCapture:
+    # page.on("response")로 GETCHA JSON 응답을 모아두고, DOM 대신 여기서 시리즈/가격 정보를 찾음
+    # 찾지 못하면 호출하는 쪽에서 기존 DOM 파싱으로 대체
+    def __init__(self, capture_dir=None):
+        self.payloads = []  # (url, json)
+        self.capture_dir = capture_dir
+        if capture_dir:
+            os.makedirs(capture_dir, exist_ok=True)
+
+    @classmethod
+    def for_today(cls, brand):
+        today = datetime.now().strftime("%Y%m%d")
+        return cls(os.path.join(CAPTURE_DIR, today, brand))
+
+    @classmethod
+    def replay(cls, capture_dir):
+        # 저장된 응답을 다시 읽어 네트워크 없이 파싱만 재현
+        capture = cls()
+        for filename in sorted(os.listdir(capture_dir)):
+            if filename.endswith(".json"):
+                with open(os.path.join(capture_dir, filename), encoding="utf-8") as f:
+                    record = json.load(f)
+                capture.payloads.append((record["url"], record["body"]))
+        logging.info(f"📼 {capture_dir}: 응답 {len(capture.payloads)}개 로드")
+        return capture
+
+    def attach(self, page):
+        page.on("response", self._on_response)
+
+    async def _on_response(self, response):
+        try:
+            if not any(host in response.url for host in CAPTURE_HOSTS):
+                return
+            if "json" not in (response.headers.get("content-type") or ""):
+                return
+            body = await response.json()
+        except Exception:
+            return
+
+        self.payloads.append((response.url, body))
+        if self.capture_dir:
+            path = os.path.join(self.capture_dir, f"{len(self.payloads):05d}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"url": response.url, "body": body}, f, ensure_ascii=False)
+
+    def mark(self):
+        return len(self.payloads)
+
+    def series_names(self, since=0):
+        names = []
+        for _, body in self.payloads[since:]:
+            for obj in walk_dicts(body):
+                name = first_value(obj, SERIES_NAME_KEYS)
+                if isinstance(name, str) and normalize_name(name) not in names:
+                    names.append(normalize_name(name))
+        return names
+
+    def find_price(self, car_model, since=0):
+        # 최근 응답부터 모델명이 같고 가격 키가 있는 객체를 찾음 → (msrp, cash_off, finance_off) 만원 단위
+        target = normalize_name(car_model)
+        for _, body in reversed(self.payloads[since:]):
+            for obj in walk_dicts(body):
+                name = first_value(obj, MODEL_NAME_KEYS)
+                if not isinstance(name, str) or normalize_name(name) != target:
+                    continue
+                raw_msrp = first_value(obj, MSRP_KEYS)
+                won = is_won(raw_msrp)
+                msrp = to_manwon(raw_msrp, won)
+                if msrp is None:
+                    continue
+                cash_off = to_manwon(first_value(obj, CASH_OFF_KEYS), won) or 0
+                finance_off = to_manwon(first_value(obj, FINANCE_OFF_KEYS), won) or 0
+                return msrp, cash_off, finance_off
+        return None
+
+    async def wait_for_price(self, car_model, since=0, until=None, timeout=6.0, interval=0.1):
+        # until(asyncio 태스크)이 끝나면 (예: DOM 가격 영역 표시) 한 번 더 확인하고 바로 반환
+        # → 일치하는 응답이 없는 모델도 DOM이 준비되는 시간 이상 기다리지 않음
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            finished = until is not None and until.done()
+            price = self.find_price(car_model, since)
+            if price is not None or finished or loop.time() >= deadline:
+                return price
+            await asyncio.sleep(interval)
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from script_loader import load_script
+import change_feed
+import recording
+from metrics import METRICS
+from waits import load_retry_policy
+from html_parser import set_default_backend, BACKENDS, DEFAULT_BACKEND
+from sharding import parse_brands
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+# 스테이지 정의: 의존 스테이지가 모두 성공하면 실행, 서로 의존하지 않는 스테이지는 동시에 실행
+STAGES = {
+    "app_scrape": [],
+    "web_scrape": [],
+    "compare": ["app_scrape", "web_scrape"],
+    "changes": ["app_scrape", "web_scrape"],
+}
+
+async def stage_app_scrape(options, results):
+    autoscrap = load_script("autoscrap.py", "autoscrap")
+    autoscrap.SETTINGS.update(options.get("app_settings", {}))
+    if options.get("request_policy"):
+        autoscrap.SETTINGS["request_policy"] = options["request_policy"]
+    return await autoscrap.main(
+        concurrency=options.get("concurrency", 1),
+        fresh=options.get("fresh", False),
+        resume=options.get("resume", False),
+        brands=options.get("brands"),
+    )
+
+async def stage_web_scrape(options, results):
+    autoscrap_web = load_script("autoscrap-web.py", "autoscrap_web")
+    autoscrap_web.ensure_directories()
+    return await autoscrap_web.scrape_all_sections(
+        concurrency=options.get("web_concurrency", 3),
+        request_policy=options.get("request_policy"),
+        brands=options.get("brands"),
+    )
+
+async def stage_compare(options, results):
+    data_compare = load_script("autoscrap-compare.py", "data_compare")
+    if "app_scrape" in results and "web_scrape" in results:
+        # 스크래퍼가 반환한 DataFrame을 그대로 사용 (엑셀 재파싱 없음)
+        data_compare.compare_frames(results["app_scrape"], results["web_scrape"], options.get("date"))
+    else:
+        # 비교 스테이지만 단독 실행하면 저장된 엑셀을 읽어서 비교
+        data_compare.main(options.get("date"))
+
+async def stage_changes(options, results):
+    # 스크래퍼가 저장한 히스토리 저장소에서 직전 수집일과 비교
+    return change_feed.main(options.get("date"))
+
+STAGE_FUNCS = {
+    "app_scrape": stage_app_scrape,
+    "web_scrape": stage_web_scrape,
+    "compare": stage_compare,
+    "changes": stage_changes,
+}
+
+async def run_pipeline(stages=None, **options):
+    stages = list(stages or STAGES)
+    options.setdefault("date", datetime.now().strftime("%Y%m%d"))
+
+    results = {}
+    status = {}
+    tasks = {}
+    METRICS.begin_run()
+
+    async def run_stage(name):
+        deps = [dep for dep in STAGES[name] if dep in stages]
+        for dep in deps:
+            await tasks[dep]
+        failed = [dep for dep in deps if status[dep] != "ok"]
+        if failed:
+            logging.error(f"⏭️ [{name}] 선행 스테이지 실패로 건너뜀: {', '.join(failed)}")
+            status[name] = "skipped"
+            return
+
+        logging.info(f"\n==== 스테이지 시작: {name} ====")
+        started = datetime.now()
+        try:
+            with METRICS.timer("stage", stage=name):
+                results[name] = await STAGE_FUNCS[name](options, results)
+            status[name] = "ok"
+            logging.info(f"✅ [{name}] 완료 ({(datetime.now() - started).total_seconds():.1f}초)")
+        except Exception as e:
+            status[name] = "failed"
+            METRICS.count("stage_failed", stage=name)
+            logging.error(f"❌ [{name}] 실패: {e}")
+
+    for name in stages:
+        if name not in STAGES:
+            raise ValueError(f"알 수 없는 스테이지: {name}")
+        tasks[name] = asyncio.ensure_future(run_stage(name))
+
+    await asyncio.gather(*tasks.values())
+    logging.info(f"파이프라인 종료: {status}")
+    try:
+        METRICS.write_run_report("pipeline")
+    except Exception as e:
+        logging.error(f"❌ 실행 리포트 저장 실패: {e}")
+    return status, results
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='앱 수집 + 웹 수집 + 비교 파이프라인')
+    parser.add_argument('--stages', type=str, default=",".join(STAGES), help='실행할 스테이지 (쉼표 구분)')
+    parser.add_argument('--concurrency', type=int, default=1, help='앱 수집 시 동시에 수집할 브랜드 수')
+    parser.add_argument('--web-concurrency', type=int, default=3, help='웹 수집 시 동시에 여는 페이지 수')
+    parser.add_argument('--fresh', action='store_true', help='오늘 이미 수집된 시리즈도 처음부터 다시 수집')
+    parser.add_argument('--resume', action='store_true', help='중단된 앱 수집을 체크포인트부터 이어서 수집')
+    parser.add_argument('--detail-mode', choices=['click', 'pool', 'http'], default='click', help='앱 모델 상세 가격 수집 방식')
+    parser.add_argument('--backend', choices=['dom', 'api'], default='dom', help='앱 가격/시리즈 추출 방식')
+    parser.add_argument('--incremental', action='store_true', help='모델 목록이 직전 수집일과 같은 시리즈는 상세 수집 생략')
+    parser.add_argument('--full-every', type=int, default=7, help='증분 모드에서 N일마다 전체 상세 수집 (0: 안 함)')
+    parser.add_argument('--request-policy', type=str, help='요청 허용 목록 JSON (기본값: src/request_policy.json)')
+    parser.add_argument('--brands', type=parse_brands, help='앱/웹에서 수집할 브랜드 (쉼표 구분)')
+    parser.add_argument('--retry-policy', type=str, help='브랜드별 재시도/대기 정책 JSON')
+    parser.add_argument('--parser', choices=BACKENDS, default=DEFAULT_BACKEND, help='HTML 파서')
+    parser.add_argument('--record', type=str, help='HAR/HTML을 기록할 폴더')
+    parser.add_argument('--replay', type=str, help='기록된 HAR로만 실행 (사이트 접속 없음)')
+    parser.add_argument('--date', type=str, help='비교/변화 스테이지만 실행할 때 기준 날짜 (YYYYMMDD)')
+
+    args = parser.parse_args()
+    set_default_backend(args.parser)
+    recording.set_mode(record=args.record, replay=args.replay)
+    if args.retry_policy:
+        load_retry_policy(args.retry_policy)
+
+    status, _ = asyncio.run(run_pipeline(
+        stages=[stage.strip() for stage in args.stages.split(",") if stage.strip()],
+        concurrency=args.concurrency,
+        web_concurrency=args.web_concurrency,
+        request_policy=args.request_policy,
+        brands=args.brands,
+        fresh=args.fresh,
+        resume=args.resume,
+        app_settings={
+            "detail_mode": args.detail_mode,
+            "backend": args.backend,
+            "incremental": args.incremental,
+            "full_every": args.full_every,
+        },
+        **({"date": args.date} if args.date else {}),
+    ))
+    sys.exit(0 if all(value == "ok" for value in status.values()) else 1)
@@ -0,0 +1,101 @@
+import glob
+import logging
+import os
+import re
+import shutil
+
+# 오프라인 기록/재생
+#   record: 브라우저 컨텍스트마다 HAR(응답 본문 포함)과 파싱에 쓰는 HTML 스냅샷을 저장
+#   replay: 저장된 HAR로만 응답 (context.route_from_har), HAR에 없는 요청은 차단 → GETCHA에 접속하지 않음
+RECORDING = {
+    "record": os.environ.get("AUTOSCRAP_RECORD"),
+    "replay": os.environ.get("AUTOSCRAP_REPLAY"),
+}
+
+def set_mode(record=None, replay=None):
+    if record and replay:
+        raise ValueError("record와 replay는 동시에 사용할 수 없습니다.")
+    RECORDING["record"] = os.path.abspath(record) if record else None
+    RECORDING["replay"] = os.path.abspath(replay) if replay else None
+    if RECORDING["record"]:
+        os.makedirs(os.path.join(RECORDING["record"], "html"), exist_ok=True)
+        logging.info(f"⏺️ 기록 모드: {RECORDING['record']}")
+    if RECORDING["replay"]:
+        logging.info(f"▶️ 재생 모드: {RECORDING['replay']}")
+
+def slug(text):
+    return re.sub(r"[^0-9A-Za-z가-힣._-]+", "_", str(text)).strip("_")[:80] or "_"
+
+async def new_context(browser, name, **kwargs):
+    # 스크래퍼는 browser.new_context() 대신 이 함수를 사용 (기록/재생 모드가 아니면 동일)
+    if RECORDING["record"]:
+        har_path = os.path.join(RECORDING["record"], f"{slug(name)}.har")
+        # 같은 이름의 컨텍스트가 여러 번 열리면 (재시도 등) 번호를 붙여 이전 기록을 덮어쓰지 않음
+        n = 1
+        while os.path.exists(har_path):
+            n += 1
+            har_path = os.path.join(RECORDING["record"], f"{slug(name)}_{n}.har")
+        return await browser.new_context(record_har_path=har_path, record_har_content="embed", **kwargs)
+
+    context = await browser.new_context(**kwargs)
+    if RECORDING["replay"]:
+        har_paths = sorted(glob.glob(os.path.join(RECORDING["replay"], "*.har")))
+        if not har_paths:
+            raise FileNotFoundError(f"{RECORDING['replay']}에 HAR 파일이 없습니다.")
+        # 나중에 등록한 route가 먼저 적용되므로: 차단 route를 먼저 등록하고 HAR들은 fallback으로 연결
+        await context.route("**/*", lambda route: route.abort())
+        for har_path in har_paths:
+            await context.route_from_har(har_path, not_found="fallback")
+    return context
+
+def snapshot(kind, name, content):
+    # 기록 모드에서만 파싱 직전의 HTML을 저장 (벤치마크/파서 비교용 고정 입력)
+    if not RECORDING["record"] or not content:
+        return
+    path = os.path.join(RECORDING["record"], "html", f"{kind}__{slug(name)}.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+def html_snapshots(recording_dir, kind):
+    return sorted(glob.glob(os.path.join(recording_dir, "html", f"{kind}__*.html")))
+
+async def run_record(out, stages):
+    # 스크래퍼는 작업 폴더 기준 경로(src/urls.json, data/...)를 쓰므로 기록 폴더 아래 workdir에서 실행
+    # → 오늘의 실제 저널/체크포인트/엑셀/history.sqlite를 건드리지 않고, 기록 당시 결과도 함께 남음
+    import pipeline
+    from script_loader import SRC_DIR
+    out = os.path.abspath(out)
+    workdir = os.path.join(out, "workdir")
+    os.makedirs(os.path.join(workdir, "src"), exist_ok=True)
+    for filename in ("urls.json", "urls-web.json"):
+        shutil.copy(os.path.join(SRC_DIR, filename), os.path.join(workdir, "src", filename))
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        set_mode(record=out)
+        # 이미 수집된 시리즈도 모두 열어야 기록이 완전하므로 fresh로 실행 (workdir 안의 저널만 초기화됨)
+        status, _ = await pipeline.run_pipeline(stages=stages, fresh=True)
+    finally:
+        set_mode()
+        os.chdir(cwd)
+    return status
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import sys
+
+    parser = argparse.ArgumentParser(description='앱/웹 수집을 실제 사이트에서 한 번 실행하며 HAR + HTML 기록')
+    parser.add_argument('--out', type=str, required=True, help='기록을 저장할 폴더 (예: data/recordings/20250625)')
+    parser.add_argument('--stages', type=str, default='app_scrape,web_scrape', help='기록할 파이프라인 스테이지')
+
+    args = parser.parse_args()
+
+    # 스크립트로 실행되면 이 파일은 __main__이므로, 스크래퍼가 import한 recording 모듈의 설정을 바꿔야 함
+    import recording
+    status = asyncio.run(recording.run_record(
+        args.out,
+        [stage.strip() for stage in args.stages.split(",") if stage.strip()],
+    ))
+    sys.exit(0 if all(value == "ok" for value in status.values()) else 1)
@@ -0,0 +1,164 @@
+import math
+import numbers
+import re
+from dataclasses import dataclass, fields, replace
+from enum import Enum
+import pandas as pd
+
+# 앱/웹 스크래퍼가 공통으로 내보내는 행 타입
+# 금액은 만원 단위 정수(없으면 None)로 들고 다니고, 엑셀/저널/비교에서 "1,234" 문자열로 바꿨다 되돌리지 않음
+
+class Brand(str, Enum):
+    BMW = "01_BMW"
+    MB = "02_MB"
+    AUDI = "03_Audi"
+    MINI = "04_Mini"
+    VOLKSWAGEN = "12_Volkswagen"
+
+    # f-string/로그/엑셀에는 "Brand.BMW"가 아닌 원래 값이 나오도록
+    def __str__(self):
+        return self.value
+
+    @classmethod
+    def parse(cls, value):
+        # 목록에 없는 브랜드(Unknown_N 등)는 문자열 그대로 유지
+        try:
+            return cls(value)
+        except ValueError:
+            return value
+
+# src/urls.json(첫 번째 검색 탭 제외), src/urls-web.json의 브랜드 URL 순서이자 엑셀 저장 순서
+BRAND_ORDER = (Brand.BMW, Brand.MINI, Brand.MB, Brand.AUDI, Brand.VOLKSWAGEN)
+
+class Fuel(str, Enum):
+    PETROL = "P"
+    DIESEL = "D"
+    BEV = "BEV"
+    PHEV = "PHEV"
+    NONE = "None"        # 연료 문구가 있지만 분류되지 않음
+    UNKNOWN = "Unknown"  # 연료 문구 자체를 찾지 못함
+
+    def __str__(self):
+        return self.value
+
+    @classmethod
+    def parse(cls, value):
+        try:
+            return cls(value)
+        except ValueError:
+            return cls.NONE
+
+MONEY_PATTERN = re.compile(r"(-?\d[\d,]*)\s*만원")
+NUMBER_PATTERN = re.compile(r"-?\d[\d,]*")
+
+def to_int(value):
+    # "1,234", "300만원", 1234.0 -> 1234 / 빈 값, "-", "N/A", NaN -> None
+    # 숫자가 여러 개면 "만원" 바로 앞 숫자, 없으면 첫 번째 숫자만 ("1,200만원 (3.5%)" -> 1200, "2025년식 6,520만원" -> 6520)
+    if value is None or value is pd.NA or isinstance(value, bool):
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, numbers.Number):
+        return int(value)
+    text = str(value).strip()
+    match = MONEY_PATTERN.search(text) or NUMBER_PATTERN.search(text)
+    if not match:
+        return None
+    return int(match.group(1 if match.re is MONEY_PATTERN else 0).replace(",", ""))
+
+def to_text(value):
+    if value is None or value is pd.NA or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+@dataclass(slots=True)
+class AppRecord:
+    year: int
+    month: int
+    day: int
+    brand: Brand
+    my: str
+    series: str
+    fuel: Fuel
+    model: str
+    msrp: int | None
+    cash_off: int
+    finance_off: int
+
+    COLUMNS = (
+        "Year", "Month", "Date", "Brand", "MY",
+        "Series", "Fuel Type", "Model (adjusted)",
+        "MSRP", "Cash_off", "Finance_off",
+    )
+    DTYPES = (
+        "int64", "int64", "int64", "category", "object",
+        "object", "category", "object",
+        "Int64", "Int64", "Int64",
+    )
+
+    def to_row(self):
+        # 저널/체크포인트/지문 JSON용 (COLUMNS 순서의 리스트)
+        return [
+            self.year, self.month, self.day, str(self.brand), self.my,
+            self.series, str(self.fuel), self.model,
+            self.msrp, self.cash_off, self.finance_off,
+        ]
+
+    @classmethod
+    def from_row(cls, row):
+        # 예전 저널/엑셀의 "1,234" 문자열도 그대로 읽음
+        year, month, day, brand, my, series, fuel, model, msrp, cash_off, finance_off = row
+        return cls(
+            to_int(year), to_int(month), to_int(day), Brand.parse(to_text(brand)), to_text(my),
+            to_text(series), Fuel.parse(to_text(fuel)), to_text(model),
+            to_int(msrp), to_int(cash_off) or 0, to_int(finance_off) or 0,
+        )
+
+    def restamp(self, when):
+        # 이전 수집 결과를 오늘 날짜 행으로 이어 쓸 때
+        return replace(self, year=when.year, month=when.month, day=when.day)
+
+@dataclass(slots=True)
+class WebRecord:
+    brand: Brand
+    series: str
+    my: str
+    model: str
+    msrp: int | None
+    off: int | None
+
+    COLUMNS = ("Brand", "Series", "MY", "Model", "MSRP", "Off")
+    DTYPES = ("category", "object", "object", "object", "Int64", "Int64")
+
+    def to_row(self):
+        return [str(self.brand), self.series, self.my, self.model, self.msrp, self.off]
+
+def records_to_frame(records, record_type=AppRecord):
+    # 컬럼 단위로 한 번에 만들고 dtype 지정 (행마다 DataFrame/Series를 만들지 않음)
+    names = [f.name for f in fields(record_type)]
+    columns = {name: [] for name in names}
+    for record in records:
+        for name in names:
+            columns[name].append(getattr(record, name))
+
+    data = {}
+    for name, column, dtype in zip(names, record_type.COLUMNS, record_type.DTYPES):
+        values = columns[name]
+        if dtype == "category":
+            values = [str(value) for value in values]
+        data[column] = pd.Series(values, dtype=dtype)
+    return pd.DataFrame(data, columns=list(record_type.COLUMNS))
+
+def money_column(series):
+    # 엑셀에서 읽은 금액 컬럼("1,234", 1234, "N/A", NaN 섞임)을 Int64로. 이미 정수형이면 그대로
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return series.astype("Int64")
+    return pd.Series(pd.array([to_int(value) for value in series], dtype="Int64"), index=series.index)
+
+def scraped_rows(df):
+    # 비교 단계가 앱 엑셀에 덧붙인 웹 전용 모델(Validated = X)은 앱에서 수집한 행이 아니므로 제외
+    if "Validated" not in df.columns:
+        return df
+    return df[df["Validated"].astype(str).str.strip() != "X"]
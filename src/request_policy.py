@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+from urllib.parse import urlsplit
+from metrics import METRICS
+
+# 브라우저 요청 허용 목록: 도메인 + 리소스 종류가 모두 허용되고 차단 키워드가 없을 때만 통과
+# 컨텍스트마다 한 번 context.route("**/*")로 적용하고, 허용/차단 요청 수와 받은 바이트를 집계
+POLICY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "request_policy.json")
+
+class RequestPolicy:
+    def __init__(self, allowed_domains, allowed_resource_types, blocked_url_keywords=(), name="run"):
+        self.allowed_domains = tuple(d.lower().lstrip(".") for d in allowed_domains)
+        self.allowed_resource_types = frozenset(allowed_resource_types)
+        self.blocked_url_keywords = tuple(blocked_url_keywords)
+        self.name = name
+        # decision -> {"requests": n, "bytes": n, "by_type": {type: n}}, blocked는 받지 않았으므로 bytes 0
+        self.stats = {
+            "allowed": {"requests": 0, "bytes": 0, "by_type": {}},
+            "blocked": {"requests": 0, "bytes": 0, "by_type": {}, "by_reason": {}},
+        }
+
+    @classmethod
+    def load(cls, path=None, name="run"):
+        with open(path or POLICY_PATH, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(
+            config["allowed_domains"],
+            config["allowed_resource_types"],
+            config.get("blocked_url_keywords", []),
+            name,
+        )
+
+    def domain_allowed(self, host):
+        host = (host or "").lower()
+        return any(host == d or host.endswith("." + d) for d in self.allowed_domains)
+
+    def decide(self, url, resource_type):
+        # 반환: None이면 허용, 아니면 차단 사유
+        if resource_type not in self.allowed_resource_types:
+            return "resource_type"
+        if not self.domain_allowed(urlsplit(url).hostname):
+            return "domain"
+        if any(keyword in url for keyword in self.blocked_url_keywords):
+            return "keyword"
+        return None
+
+    def _record(self, decision, resource_type, reason=None):
+        stat = self.stats[decision]
+        stat["requests"] += 1
+        stat["by_type"][resource_type] = stat["by_type"].get(resource_type, 0) + 1
+        if reason:
+            stat["by_reason"][reason] = stat["by_reason"].get(reason, 0) + 1
+        METRICS.count("requests", scraper=self.name, decision=decision, type=resource_type)
+
+    async def _handle(self, route):
+        request = route.request
+        reason = self.decide(request.url, request.resource_type)
+        if reason:
+            self._record("blocked", request.resource_type, reason)
+            await route.abort()
+        else:
+            self._record("allowed", request.resource_type)
+            # continue_ 대신 fallback: 재생 모드에서 먼저 등록된 HAR route가 응답하도록 넘김
+            await route.fallback()
+
+    async def _on_finished(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        size = max(0, sizes["responseBodySize"]) + max(0, sizes["responseHeadersSize"])
+        self.stats["allowed"]["bytes"] += size
+        METRICS.count("request_bytes", size, scraper=self.name, type=request.resource_type)
+
+    async def apply(self, context):
+        # 컨텍스트 단위로 한 번만 등록 (페이지마다 route를 다시 걸지 않음)
+        await context.route("**/*", self._handle)
+        context.on("requestfinished", self._on_finished)
+
+    def log_summary(self):
+        allowed, blocked = self.stats["allowed"], self.stats["blocked"]
+        logging.info(
+            f"🌐 [{self.name}] 요청 허용 {allowed['requests']}개 ({allowed['bytes'] / 1024 / 1024:.1f}MB), "
+            f"차단 {blocked['requests']}개 {blocked['by_reason']} / 허용 종류 {allowed['by_type']} / 차단 종류 {blocked['by_type']}"
+        )
+        return self.stats
@@ -0,0 +1,239 @@
+import glob
+import json
+import os
+import logging
+from datetime import datetime
+import pandas as pd
+from records import AppRecord, scraped_rows
+
+COLUMNS = list(AppRecord.COLUMNS)
+
+JOURNAL_DIR = "data/journal"
+
+def journal_path(journal_dir, prefix, date, partition=None):
+    # partition: 샤드 실행 시 각 프로세스가 따로 쓰는 파일 (예: car_data_20250101.shard1of3.jsonl)
+    suffix = f".{partition}" if partition else ""
+    return os.path.join(journal_dir, f"{prefix}_{date}{suffix}.jsonl")
+
+def read_jsonl(path):
+    if not os.path.exists(path):
+        return []
+
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # 기록 도중 종료되어 잘린 마지막 줄은 버림
+                logging.warning(f"⚠️ {path} {line_no}번째 줄 손상, 무시합니다.")
+    return records
+
+class RowJournal:
+    # 시리즈 단위로 수집 결과를 JSONL에 한 줄씩 추가 기록 (append-only)
+    # 매 시리즈마다 flush + fsync 하므로 중간에 프로세스가 죽어도 완료된 시리즈는 남음
+    def __init__(self, date=None, journal_dir=JOURNAL_DIR, partition=None):
+        self.date = date or datetime.now().strftime("%Y%m%d")
+        self.journal_dir = journal_dir
+        self.partition = partition
+        self.path = journal_path(journal_dir, "car_data", self.date, partition)
+        os.makedirs(journal_dir, exist_ok=True)
+        self._repair_tail()
+        # (date, brand, series) -> [AppRecord], 이미 수집된 시리즈 중복 방지용
+        self.index = {}
+
+    def _repair_tail(self):
+        # 직전 실행이 줄 중간에서 죽었다면 다음 기록이 잘린 줄에 붙지 않도록 줄바꿈을 보충
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def reset(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.index = {}
+
+    def load_index(self, excel_path=None, seed_path=None, owns=None):
+        # 실행 시작 시 한 번만 호출. 저널이 없고 오늘 엑셀만 있으면 엑셀을 한 번 읽어 저널로 옮김
+        # seed_path: 샤드 파티션 저널이면 일일 저널. 거기 이미 있는 시리즈(owns가 참인 것만)를 인덱스에만 올려 스킵하고
+        # 파티션 파일에는 쓰지 않음 (병합 시 일일 저널이 먼저 읽히므로 그 행은 그대로 남고, 파티션 기록이 우선)
+        if not os.path.exists(self.path) and excel_path and os.path.exists(excel_path):
+            self._import_excel(excel_path)
+
+        self.index = {}
+        if seed_path:
+            for record in read_jsonl(seed_path):
+                if owns and not owns(record["brand"], record["series"]):
+                    continue
+                self.index[(self.date, record["brand"], record["series"])] = [AppRecord.from_row(row) for row in record["rows"]]
+            if self.index:
+                logging.info(f"📒 {seed_path}: 이 파티션이 맡은 시리즈 중 이미 수집된 {len(self.index)}개 로드")
+
+        for record in self.read_records():
+            self.index[(self.date, record["brand"], record["series"])] = [AppRecord.from_row(row) for row in record["rows"]]
+
+        if self.index:
+            logging.info(f"📒 {self.path}: 이미 수집된 시리즈 {len(self.index)}개 로드")
+        return self.index
+
+    def _import_excel(self, excel_path):
+        # 숫자처럼 보이는 시리즈/연식도 스크래퍼가 만드는 값과 같은 문자열로 읽어야 키가 일치함
+        df = pd.read_excel(excel_path, dtype={"Brand": str, "MY": str, "Series": str, "Model (adjusted)": str})
+        # 비교 단계가 덧붙인 웹 전용 행(Validated = X)을 수집 결과로 기록하면 그 시리즈가 완료로 처리되어 스킵되므로 제외
+        df = scraped_rows(df)
+        df = df.reindex(columns=COLUMNS).astype(object).where(df.notna(), None)
+
+        for (brand, series), group in df.groupby(["Brand", "Series"], sort=False):
+            self.append_series(brand, series, [AppRecord.from_row(row) for row in group.values.tolist()])
+        logging.info(f"📒 {excel_path} → {self.path} 변환 완료")
+
+    def is_done(self, brand, series):
+        return (self.date, brand, series) in self.index
+
+    def done_rows(self, brand, series):
+        return self.index.get((self.date, brand, series), [])
+
+    def append_series(self, brand, series, rows):
+        # rows: [AppRecord], 파일에는 COLUMNS 순서의 리스트로 기록
+        # 이미 있는 시리즈를 다시 기록하면 덮어쓰기 (rows()/load_index는 마지막 기록을 사용)
+        record = {"brand": brand, "series": series, "rows": [row.to_row() for row in rows]}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.index[(self.date, brand, series)] = rows
+
+    def read_records(self):
+        return read_jsonl(self.path)
+
+    def partition_paths(self):
+        # 오늘 날짜의 샤드 파티션 저널들, 오래된 것부터 (병합 시 나중 기록이 우선)
+        pattern = journal_path(self.journal_dir, "car_data", self.date, "shard*")
+        return sorted(glob.glob(pattern), key=os.path.getmtime)
+
+    def merge_partitions(self, paths=None):
+        # 샤드 파티션을 이 (일일) 저널로 합침. 같은 (brand, series)는 나중에 기록된 쪽이 우선
+        # 임시 파일에 쓴 뒤 교체하므로 병합을 반복 실행해도 중복 행이 생기지 않음
+        paths = self.partition_paths() if paths is None else paths
+        merged = {}
+        for path in [self.path] + list(paths):
+            for record in read_jsonl(path):
+                merged[(record["brand"], record["series"])] = record
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in merged.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        self.index = {
+            (self.date, brand, series): [AppRecord.from_row(row) for row in record["rows"]]
+            for (brand, series), record in merged.items()
+        }
+        logging.info(f"🧩 파티션 {len(paths)}개 → {self.path} 병합 완료 (시리즈 {len(merged)}개)")
+        return self.index
+
+    def rows(self, brand_order=None):
+        # 같은 (brand, series)가 여러 번 기록되었으면 (단일 시리즈 재수집 등) 마지막 기록만 사용, 순서는 처음 기록 위치
+        latest = {}
+        for record in self.read_records():
+            latest[(record["brand"], record["series"])] = record
+        records = list(latest.values())
+        if brand_order:
+            # 브랜드 순서는 brand_order 기준, 같은 브랜드 안에서는 기록 순서 유지 (stable sort)
+            rank = {brand: n for n, brand in enumerate(brand_order)}
+            records.sort(key=lambda r: rank.get(r["brand"], len(rank)))
+
+        rows = []
+        for record in records:
+            rows.extend(AppRecord.from_row(row) for row in record["rows"])
+        return rows
+
+    def brand_rows(self, brand):
+        rows = []
+        for (_, record_brand, _), series_rows in self.index.items():
+            if record_brand == brand:
+                rows.extend(series_rows)
+        return rows
+
+class Checkpoint:
+    # 모델 단위 진행 상황 기록: (brand, series, model index) 완료 여부와 브랜드 완료 여부
+    # --resume 실행 시 첫 번째 미완료 단위부터 다시 시작하기 위해 사용
+    def __init__(self, date=None, journal_dir=JOURNAL_DIR, partition=None):
+        self.date = date or datetime.now().strftime("%Y%m%d")
+        self.path = journal_path(journal_dir, "checkpoint", self.date, partition)
+        os.makedirs(journal_dir, exist_ok=True)
+        self.models = {}
+        self.brands = set()
+
+    def reset(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.models = {}
+        self.brands = set()
+
+    def load(self):
+        self.models = {}
+        self.brands = set()
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record["type"] == "brand":
+                    self.brands.add(record["brand"])
+                elif record["type"] == "model":
+                    key = (record["brand"], record["series"], record["index"])
+                    self.models[key] = record
+
+        logging.info(f"📌 체크포인트 로드: 완료 브랜드 {len(self.brands)}개, 완료 모델 {len(self.models)}개")
+
+    def _write(self, record):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def mark_model(self, brand, series, index, model, row):
+        # row가 []이면 할인 없는 모델 (다시 열어볼 필요 없음)
+        record = {"type": "model", "brand": brand, "series": series, "index": index, "model": model, "row": row.to_row() if row else row}
+        self._write(record)
+        self.models[(brand, series, index)] = record
+
+    def model_done(self, brand, series, index, model=None):
+        # model: 현재 목록의 index 위치 모델명. 기록된 모델명과 다르면 (목록 순서 변경 등) 미완료로 보고 다시 수집
+        record = self.models.get((brand, series, index))
+        if record is None:
+            return False
+        if model is not None and record.get("model") != model:
+            logging.info(f"🔀 {series} 모델 {index + 1}번 위치가 {record.get('model')} → {model}로 바뀌어 다시 수집")
+            return False
+        return True
+
+    def model_row(self, brand, series, index):
+        row = self.models[(brand, series, index)]["row"]
+        return AppRecord.from_row(row) if row else row
+
+    def mark_brand(self, brand):
+        self._write({"type": "brand", "brand": brand})
+        self.brands.add(brand)
+
+    def brand_done(self, brand):
+        return brand in self.brands
@@ -0,0 +1,17 @@
+import importlib.util
+import os
+import sys
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_script(filename, module_name):
+    # autoscrap-web.py처럼 하이픈이 들어간 스크립트는 import 문으로 불러올 수 없으므로 파일 경로로 로드
+    # 같은 이름으로 이미 로드된 모듈은 재사용 (SETTINGS 같은 모듈 상태를 한 곳에서 공유)
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SRC_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+import history_store
+from records import AppRecord
+
+# 증분 수집: 브랜드 iframe에 보이는 시리즈 모델 목록(모델명/연식/연료/가격·할인 배지 텍스트)의 지문을
+# 직전 수집일과 비교해, 같으면 상세 페이지를 다시 열지 않고 직전 결과를 그대로 사용
+MODEL_BLOCK_SELECTOR = "div.sc-80108d2f-0.hlytKE"
+DEFAULT_FULL_EVERY = 7  # 같은 결과를 이어 쓴 지 N일이 지나면 다시 상세 수집 (0이면 강제 갱신 안 함)
+
+def fingerprint_series(root, records):
+    # root: extract_model_records가 이미 파싱한 브랜드 iframe 문서 (시리즈마다 한 번만 파싱)
+    blocks = [block.strings() for block in root.select(MODEL_BLOCK_SELECTOR)]
+    payload = json.dumps({"records": records, "blocks": blocks}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+class SeriesFingerprints:
+    def __init__(self, date=None, full_every=DEFAULT_FULL_EVERY, path=history_store.HISTORY_PATH):
+        self.date = date or datetime.now().strftime("%Y%m%d")
+        self.full_every = full_every
+        self.path = path
+        self.previous = {}
+        self.prev_date = None
+        self.pending = {}  # (brand, series) -> 기록할 지문 (flush에서 한 번에 저장)
+
+    def load(self):
+        # 오늘 이전 가장 최근 수집일의 지문을 한 번만 읽어둠
+        self.prev_date = history_store.previous_fingerprint_date(self.date, self.path)
+        self.previous = history_store.load_fingerprints(self.prev_date, self.path) if self.prev_date else {}
+        if self.previous:
+            logging.info(f"🧬 {self.prev_date} 시리즈 지문 {len(self.previous)}개 로드 (증분 수집)")
+        return self.previous
+
+    def carry_forward(self, brand, series, fingerprint):
+        # 지문이 같고 강제 갱신 주기가 지나지 않았으면 직전 행을 오늘 날짜로 바꿔 반환, 아니면 None
+        previous = self.previous.get((brand, series))
+        if previous is None or previous["fingerprint"] != fingerprint:
+            return None
+
+        source_date = previous["source_date"]
+        age = (datetime.strptime(self.date, "%Y%m%d") - datetime.strptime(source_date, "%Y%m%d")).days
+        if self.full_every and age >= self.full_every:
+            logging.info(f"🔄 {series} {source_date} 이후 {age}일 동안 상세 수집 안 함, 다시 수집")
+            return None
+
+        now = datetime.now()
+        rows = [AppRecord.from_row(row).restamp(now) for row in previous["rows"]]
+        self.record(brand, series, fingerprint, rows, source_date)
+        return rows
+
+    def record(self, brand, series, fingerprint, rows, source_date=None):
+        # source_date: 상세 페이지를 실제로 수집한 날짜 (이어 쓴 결과는 원래 날짜 유지)
+        # 시리즈마다 DB에 쓰지 않고 모아 두었다가 실행 마지막에 flush()로 한 번에 저장
+        rows = [row.to_row() for row in rows]
+        self.pending[(str(brand), series)] = (fingerprint, source_date or self.date, rows)
+
+    def flush(self):
+        if not self.pending:
+            return 0
+        entries = [(brand, series, *entry) for (brand, series), entry in self.pending.items()]
+        try:
+            history_store.save_fingerprints(self.date, entries, self.path)
+        except Exception as e:
+            logging.error(f"❌ 시리즈 지문 저장 실패: {e}")
+            return 0
+        self.pending.clear()
+        logging.info(f"🧬 시리즈 지문 {len(entries)}개 저장")
+        return len(entries)
@@ -0,0 +1,100 @@
+import argparse
+import logging
+import subprocess
+import sys
+import zlib
+from records import Brand, BRAND_ORDER
+
+# 여러 프로세스/VM에 수집을 나누기 위한 브랜드 선택과 N개 중 k번째 샤드 할당
+#   시리즈가 많은 브랜드(SPLIT_BRANDS)는 시리즈 단위로 crc32(브랜드/시리즈) % N 으로 나누고
+#   나머지 브랜드는 선택된 순서대로 샤드에 돌아가며 통째로 할당
+# 샤드는 각자 저널 파티션(car_data_YYYYMMDD.shardKofN.jsonl)에만 기록하고, 병합 단계에서 일일 결과를 만듦
+SPLIT_BRANDS = (Brand.BMW, Brand.MB)
+
+def parse_brands(text):
+    # "01_BMW,Mini,audi" → [Brand.BMW, Brand.MINI, Brand.AUDI] (값/이름 모두 허용, 대소문자 무시)
+    brands = []
+    for token in (t.strip() for t in text.split(",")):
+        if not token:
+            continue
+        for brand in Brand:
+            if token.lower() in (brand.value.lower(), brand.name.lower(), brand.value.split("_", 1)[1].lower()):
+                break
+        else:
+            raise argparse.ArgumentTypeError(f"알 수 없는 브랜드: {token} (가능: {', '.join(b.value for b in Brand)})")
+        if brand not in brands:
+            brands.append(brand)
+    return brands
+
+class Shard:
+    def __init__(self, index, count):
+        # index: 1부터 시작
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"잘못된 샤드: {index}/{count}")
+        self.index = index
+        self.count = count
+        self.name = f"shard{index}of{count}"
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
+
+    @classmethod
+    def parse(cls, text):
+        # "2/4" → Shard(2, 4)
+        try:
+            index, count = (int(part) for part in text.split("/"))
+            return cls(index, count)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"샤드는 k/N 형식이어야 합니다 (예: 1/3): {text}")
+
+    def brands(self, brands):
+        # 이 샤드가 페이지를 열어야 하는 브랜드 (시리즈 단위로 나누는 브랜드는 모든 샤드가 엶)
+        whole = [brand for brand in brands if brand not in SPLIT_BRANDS]
+        return [
+            brand for brand in brands
+            if brand in SPLIT_BRANDS or whole.index(brand) % self.count == self.index - 1
+        ]
+
+    def owns_series(self, brand, series):
+        if brand not in SPLIT_BRANDS:
+            return True
+        return zlib.crc32(f"{brand}/{series}".encode("utf-8")) % self.count == self.index - 1
+
+def selected_brands(brands=None, shard=None):
+    brands = list(brands or BRAND_ORDER)
+    return shard.brands(brands) if shard else brands
+
+def tag_logs(shard):
+    # 여러 샤드를 한 터미널에서 돌릴 때 로그가 어느 샤드 것인지 보이도록
+    for handler in logging.getLogger().handlers:
+        handler.setFormatter(logging.Formatter(f"%(asctime)s [%(levelname)s] [샤드 {shard}] %(message)s"))
+
+def strip_option(argv, option, has_value=True):
+    # --spawn 3 / --spawn=3 을 명령행에서 제거 (자식 프로세스에 그대로 넘기지 않도록)
+    result = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+            continue
+        if arg == option:
+            skip = has_value
+            continue
+        if arg.startswith(option + "="):
+            continue
+        result.append(arg)
+    return result
+
+def spawn_shards(script, count, argv):
+    # 같은 인자로 샤드 수만큼 프로세스를 띄우고 모두 끝날 때까지 대기 → 종료 코드 목록
+    argv = strip_option(strip_option(argv, "--spawn"), "--shard")
+    processes = [
+        subprocess.Popen([sys.executable, script, *argv, "--shard", f"{index}/{count}"])
+        for index in range(1, count + 1)
+    ]
+    logging.info(f"🧩 샤드 프로세스 {count}개 시작: {script}")
+    codes = [process.wait() for process in processes]
+    failed = [f"{index}/{count}" for index, code in enumerate(codes, 1) if code != 0]
+    if failed:
+        logging.error(f"❌ 실패한 샤드: {', '.join(failed)}")
+    return codes
@@ -0,0 +1,49 @@
+import asyncio
+import json
+import logging
+import random
+
+# 고정 sleep 대신 필요한 요소가 준비됐는지로 대기하고, 재시도는 지수 백오프 + 지터
+# 브랜드별로 다르게 설정 가능 (기본값 위에 덮어씀). --retry-policy로 JSON 파일을 주면 그 값으로 갱신
+RETRY_POLICY = {
+    "default": {
+        "max_retries": 5,        # 최대 시도 횟수
+        "base_delay": 1.0,       # 첫 재시도 전 대기 (초), 이후 2배씩
+        "max_delay": 20.0,       # 재시도 대기 상한 (초)
+        "jitter": 0.5,           # 대기 시간을 ±50% 범위에서 무작위로 조정 (동시 실행 시 재시도가 몰리지 않도록)
+        "ready_timeout": 15000,  # 브랜드 페이지 시리즈 목록이 나타날 때까지 최대 대기 (ms)
+    },
+    # BMW는 시리즈가 많아 목록 렌더링이 가장 느림 (기존에도 다른 브랜드보다 2초 더 대기)
+    "01_BMW": {"ready_timeout": 25000},
+}
+
+def load_retry_policy(path):
+    with open(path, encoding="utf-8") as f:
+        overrides = json.load(f)
+    for brand, values in overrides.items():
+        RETRY_POLICY.setdefault(brand, {}).update(values)
+    logging.info(f"🔁 재시도 정책 로드: {path}")
+
+def retry_policy(brand):
+    return {**RETRY_POLICY["default"], **RETRY_POLICY.get(brand, {})}
+
+def backoff_delay(policy, attempt):
+    # attempt: 1부터 시작하는 재시도 번호
+    delay = min(policy["max_delay"], policy["base_delay"] * (2 ** (attempt - 1)))
+    return max(0.0, delay * (1 + random.uniform(-policy["jitter"], policy["jitter"])))
+
+async def wait_until_ready(locator, timeout, interval=0.25, stable_checks=2):
+    # 첫 요소가 나타난 뒤, 개수가 interval 간격으로 stable_checks번 연속 같으면 렌더링이 끝난 것으로 판단
+    # timeout(ms) 안에 첫 요소가 나타나지 않으면 Playwright TimeoutError
+    await locator.first.wait_for(state="attached", timeout=timeout)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout / 1000
+    last, stable = -1, 0
+    while stable < stable_checks and loop.time() < deadline:
+        count = await locator.count()
+        stable = stable + 1 if count == last else 0
+        last = count
+        if stable < stable_checks:
+            await asyncio.sleep(interval)
+    return last